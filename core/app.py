@@ -319,7 +319,18 @@ class Application(Broadcaster):
                 query[qtype] = {s.strip() for s in qargs.split(',')}
             elif qtype == 'amount':
                 try:
-                    query['amount'] = abs(parse_amount(qargs, self._default_currency, with_expression=False))
+                    if '..' in qargs:
+                        # amount range, such as "100..200"
+                        bounds = [s.strip() for s in qargs.split('..', 1)]
+                        if not all(bounds):
+                            raise ValueError("Incomplete amount range")
+                        low, high = (
+                            abs(parse_amount(s, self._default_currency, with_expression=False))
+                            for s in bounds
+                        )
+                        query['amount'] = (low, high) if low <= high else (high, low)
+                    else:
+                        query['amount'] = abs(parse_amount(qargs, self._default_currency, with_expression=False))
                 except ValueError:
                     pass
             else:
@@ -5,6 +5,8 @@
 # http://www.gnu.org/licenses/gpl-3.0.html
 
 import datetime
+import hashlib
+import json
 import time
 import uuid
 import logging
@@ -13,7 +15,7 @@ import os.path as op
 from functools import wraps
 
 from hscommon.notify import Repeater
-from hscommon.util import nonone, allsame, dedupe, extract, first
+from hscommon.util import nonone, allsame, dedupe, extract, first, flatten
 from hscommon.trans import tr
 from hscommon.gui.base import GUIObject
 
@@ -28,8 +30,9 @@ from .model.date import (
     MonthRange, QuarterRange, YearRange, YearToDateRange, RunningYearRange,
     AllTransactionsRange, CustomDateRange, inc_month
 )
-from .model.oven import Oven
+from .model.oven import Oven, HistoryCheckpoint
 from .model.recurrence import Spawn
+from .model.transaction import StringPool
 from .model.transaction_list import TransactionList
 from .model.undo import Undoer, Action
 from .saver.native import save as save_native
@@ -113,24 +116,32 @@ class BaseDocument:
         self.schedules = []
         self.budgets = BudgetList()
         self.oven = Oven(self.accounts, self.transactions, self.schedules, self.budgets)
+        #: :class:`.StringPool` for the descriptions, payees and memos of our transactions.
+        self.string_pool = StringPool()
 
     # --- Private
     def _add_transactions(self, transactions):
         if not transactions:
             return
         for txn in transactions:
+            txn.intern_strings(self.string_pool)
             self.transactions.add(txn)
         min_date = min(t.date for t in transactions)
-        self._cook(from_date=min_date)
+        self._cook(from_date=min_date, affected_accounts=self._affected_accounts(transactions))
+
+    def _affected_accounts(self, transactions):
+        return set(flatten(t.affected_accounts() for t in transactions))
 
     def _change_transaction(
             self, transaction, date=NOEDIT, description=NOEDIT, payee=NOEDIT,
             checkno=NOEDIT, from_=NOEDIT, to=NOEDIT, amount=NOEDIT, currency=NOEDIT,
             notes=NOEDIT, global_scope=False):
-        date_changed = date is not NOEDIT and date != transaction.date
+        old_date = transaction.date
+        date_changed = date is not NOEDIT and date != old_date
         transaction.change(
             date=date, description=description, payee=payee, checkno=checkno,
-            from_=from_, to=to, amount=amount, currency=currency, notes=notes
+            from_=from_, to=to, amount=amount, currency=currency, notes=notes,
+            string_pool=self.string_pool
         )
         # XXX This Spawn-related code piece doesn't belong in `BaseDocument`, but in the middle of
         # a big refactoring, there wasn't an easy way to extract it out to `Document` without
@@ -145,6 +156,7 @@ class BaseDocument:
                 materialized = transaction.replicate()
                 self.transactions.add(materialized)
         else:
+            self.transactions.reindex_transaction(transaction, old_date)
             if transaction not in self.transactions:
                 self.transactions.add(transaction)
             elif date_changed:
@@ -161,11 +173,12 @@ class BaseDocument:
     def _clear(self):
         self.accounts.clear()
         self.transactions.clear()
+        self.string_pool = StringPool()
         self._cook()
 
-    def _cook(self, from_date=None):
+    def _cook(self, from_date=None, affected_accounts=None):
         # Without date ranges and spawns, it's OK to pass `None` as an `until_date`.
-        self.oven.cook(from_date=from_date, until_date=None)
+        self.oven.cook(from_date=from_date, until_date=None, affected_accounts=affected_accounts)
 
     # --- Public
     def change_transaction(self, original, new, global_scope=False):
@@ -193,13 +206,14 @@ class BaseDocument:
         for split in new.splits:
             if split.account is not None:
                 split.account = self.accounts.find(split.account.name, split.account.type)
-        original.set_splits(new.splits, preserve_instances=True)
+        affected_accounts = self._affected_accounts([original, new])
+        original.set_splits(new.splits, preserve_instances=True, string_pool=self.string_pool)
         min_date = min(original.date, new.date)
         self._change_transaction(
             original, date=new.date, description=new.description,
             payee=new.payee, checkno=new.checkno, notes=new.notes, global_scope=global_scope
         )
-        self._cook(from_date=min_date)
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories()
 
     def change_transactions(
@@ -237,13 +251,15 @@ class BaseDocument:
             Currency.get_rates_db().ensure_rates(date, currencies_to_ensure)
 
         min_date = date if date is not NOEDIT else datetime.date.max
+        affected_accounts = self._affected_accounts(transactions)
         for transaction in transactions:
             min_date = min(min_date, transaction.date)
             self._change_transaction(
                 transaction, date=date, description=description, payee=payee, checkno=checkno,
                 from_=from_, to=to, amount=amount, currency=currency, global_scope=global_scope
             )
-        self._cook(from_date=min_date)
+        affected_accounts |= self._affected_accounts(transactions)
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories()
 
     def delete_transactions(self, transactions, from_account=None, global_scope=False):
@@ -263,6 +279,7 @@ class BaseDocument:
         :param from_account: the :class:`.Account` from which the operation takes place, if any.
         :param bool global_scope: Whether this changes affect the whole recurrence (if applicable)
         """
+        affected_accounts = self._affected_accounts(transactions)
         for txn in transactions:
             if isinstance(txn, Spawn):
                 if global_scope:
@@ -272,7 +289,7 @@ class BaseDocument:
             else:
                 self.transactions.remove(txn)
         min_date = min(t.date for t in transactions)
-        self._cook(from_date=min_date)
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories(from_account=from_account)
 
     def duplicate_transactions(self, transactions):
@@ -332,6 +349,7 @@ class BaseDocument:
             Currency.get_rates_db().ensure_rates(date, [amount.currency.code, entry.account.currency.code])
         candidate_dates = [entry.date, date, reconciliation_date, entry.reconciliation_date]
         min_date = min(d for d in candidate_dates if d is not NOEDIT and d is not None)
+        affected_accounts = self._affected_accounts([entry.transaction])
         if reconciliation_date is not NOEDIT:
             entry.split.reconciliation_date = reconciliation_date
         if (amount is not NOEDIT) and (len(entry.splits) == 1):
@@ -344,7 +362,8 @@ class BaseDocument:
             entry.transaction, date=date, description=description,
             payee=payee, checkno=checkno, global_scope=global_scope
         )
-        self._cook(from_date=min_date)
+        affected_accounts |= self._affected_accounts([entry.transaction])
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories()
 
     def delete_entries(self, entries):
@@ -470,8 +489,34 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._dirty_flag = False
         BaseDocument._clear(self)
 
-    def _cook(self, from_date=None):
-        self.oven.cook(from_date=from_date, until_date=self.date_range.end)
+    def _content_hash(self, filename):
+        # Returns the hash our cooked cache is keyed on, or None if we have no cache or can't read
+        # `filename`.
+        if self._cooked_cache_path() is None:
+            return None
+        hasher = hashlib.sha1()
+        try:
+            with open(filename, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+        except OSError:
+            return None
+        return hasher.hexdigest()
+
+    def _cook(self, from_date=None, affected_accounts=None):
+        self.oven.cook(
+            from_date=from_date, until_date=self.date_range.end, affected_accounts=affected_accounts
+        )
+
+    def _cooked_cache_path(self):
+        if not self.app.cache_path or self._document_id is None:
+            return None
+        return op.join(self.app.cache_path, 'cooked_{0}.json'.format(self._document_id))
+
+    def _first_cooked_date(self, date_range):
+        # The first date that has to be cooked for `date_range` to be correctly displayed. Reports
+        # show figures for the previous range too.
+        return min(date_range.start, date_range.prev().start)
 
     def _get_action_from_changed_transactions(self, transactions, global_scope=False):
         if len(transactions) == 1 and not isinstance(transactions[0], Spawn) \
@@ -487,6 +532,34 @@ class Document(BaseDocument, Repeater, GUIObject):
                 action.change_schedule(schedule)
         return action
 
+    def _load_cooked_cache(self, content_hash):
+        # Returns the oven checkpoint we cached for our document if it's for the same content.
+        path = self._cooked_cache_path()
+        if content_hash is None or path is None or not op.exists(path):
+            return None
+
+        def str2date(s):
+            return datetime.datetime.strptime(s, DATE_FORMAT_FOR_PREFERENCES).date()
+
+        name2account = {account.name: account for account in self.accounts}
+        try:
+            with open(path, 'rt', encoding='utf-8') as fp:
+                cache = json.load(fp)
+            if cache['content_hash'] != content_hash:
+                return None
+            checkpoint = HistoryCheckpoint(str2date(cache['from_date']))
+            for name, state in cache['accounts'].items():
+                if state is not None:
+                    str_date, *str_amounts = state
+                    amounts = [parse_amount(s, with_expression=False) for s in str_amounts]
+                    state = (str2date(str_date), ) + tuple(amounts)
+                checkpoint.account2state[name2account[name]] = state
+            return checkpoint
+        except (OSError, ValueError, KeyError, TypeError):
+            # We can always cook without our cache.
+            logging.warning("Could not read cooked cache %s", path)
+            return None
+
     def _query_for_scope_if_needed(self, transactions):
         """Queries the UI for change scope if there's any Spawn among transactions.
 
@@ -559,6 +632,39 @@ class Document(BaseDocument, Repeater, GUIObject):
             self.select_all_transactions_range()
         self.notify('document_restoring_preferences')
 
+    def _save_cooked_cache(self, content_hash):
+        # Caches the oven's checkpoint so that loading the document with `content_hash` doesn't
+        # have to cook its history.
+        path = self._cooked_cache_path()
+        if content_hash is None or path is None:
+            return
+        checkpoint = self.oven.checkpoint
+        if checkpoint is None:
+            if op.exists(path):
+                os.remove(path)
+            return
+        accounts = {}
+        for account in self.accounts:
+            if account in checkpoint.converted_accounts:
+                continue
+            # Accounts created since the checkpoint have no history.
+            state = checkpoint.account2state.get(account)
+            if state is not None:
+                date, *amounts = state
+                state = [date.strftime(DATE_FORMAT_FOR_PREFERENCES)]
+                state += [format_amount(amount) for amount in amounts]
+            accounts[account.name] = state
+        cache = {
+            'content_hash': content_hash,
+            'from_date': checkpoint.from_date.strftime(DATE_FORMAT_FOR_PREFERENCES),
+            'accounts': accounts,
+        }
+        try:
+            with open(path, 'wt', encoding='utf-8') as fp:
+                json.dump(cache, fp)
+        except OSError:
+            logging.warning("Could not write cooked cache %s", path)
+
     def _save_preferences(self):
         dr = self.date_range
         selected_range = DATE_RANGE_MONTH
@@ -616,6 +722,7 @@ class Document(BaseDocument, Repeater, GUIObject):
                 account.group = group
             if account_number is not NOEDIT:
                 account.account_number = account_number
+                self.accounts.reindex_account(account)
             if inactive is not NOEDIT:
                 account.inactive = inactive
             if notes is not NOEDIT:
@@ -956,6 +1063,13 @@ class Document(BaseDocument, Repeater, GUIObject):
         for spawn in spawns:
             action.change_schedule(spawn.transaction.recurrence)
         self._undoer.record(action)
+        affected_accounts = {entry.account for entry in entries}
+        # When splits only go from being reconciled at their own date to not being reconciled (or
+        # the other way around), reconciliation order stays the same and we don't have to cook.
+        toggle_only = not spawns and all(
+            split.reconciliation_date in {None, split.transaction.date} for split in splits
+        )
+        toggled = [split for split in splits if split.reconciled != newvalue]
         if newvalue:
             for split in splits:
                 split.reconciliation_date = split.transaction.date
@@ -963,10 +1077,14 @@ class Document(BaseDocument, Repeater, GUIObject):
                 # XXX update transaction selection
                 materialized_split = self._reconcile_spawn_split(spawn, spawn.transaction.date)
                 action.added_transactions.add(materialized_split.transaction)
+                affected_accounts |= materialized_split.transaction.affected_accounts()
         else:
             for split in splits:
                 split.reconciliation_date = None
-        self._cook(from_date=min_date)
+        if toggle_only:
+            self.oven.toggle_reconciled(toggled)
+        else:
+            self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self.notify('transaction_changed')
 
     # --- Budget
@@ -1076,10 +1194,10 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._undoer.record(action)
         original = schedule.ref
         min_date = min(original.date, new_ref.date)
-        original.set_splits(new_ref.splits)
+        original.set_splits(new_ref.splits, string_pool=self.string_pool)
         original.change(
             description=new_ref.description, payee=new_ref.payee,
-            checkno=new_ref.checkno, notes=new_ref.notes
+            checkno=new_ref.checkno, notes=new_ref.notes, string_pool=self.string_pool
         )
         schedule.start_date = new_ref.date
         schedule.repeat_type = repeat_type
@@ -1126,7 +1244,9 @@ class Document(BaseDocument, Repeater, GUIObject):
         if month_diff < 1:
             return
         for txn in self.transactions[:]:
-            txn.date = inc_month_overflow(txn.date, month_diff)
+            old_date = txn.date
+            txn.date = inc_month_overflow(old_date, month_diff)
+            self.transactions.reindex_transaction(txn, old_date)
             if txn.date > TODAY:
                 self.transactions.remove(txn)
             for split in txn.splits:
@@ -1147,6 +1267,7 @@ class Document(BaseDocument, Repeater, GUIObject):
                     continue
                 newdate = inc_month_overflow(date, month_diff)
                 schedule.date2exception[newdate] = exception
+            schedule.reset_spawn_cache()
         self._cook()
         self.notify('document_changed') # do it again to refresh the guis
 
@@ -1167,8 +1288,9 @@ class Document(BaseDocument, Repeater, GUIObject):
             loader.parse(filename)
         except FileFormatError:
             raise FileFormatError(tr('"%s" is not a moneyGuru file') % filename)
-        loader.load()
+        loader.load(cook=False) # we're cooking ourselves below
         self._clear()
+        self.string_pool = loader.string_pool
         self._document_id = loader.document_id
         for propname in self._properties:
             if propname in loader.properties:
@@ -1184,7 +1306,14 @@ class Document(BaseDocument, Repeater, GUIObject):
         for budget in loader.budgets:
             self.budgets.append(budget)
         self.accounts.default_currency = self.default_currency
-        self._cook()
+        # We only cook what our date range needs. The rest is cooked when needed. If we have a
+        # cached checkpoint for this exact content, we don't even have to go through the history.
+        content_hash = self._content_hash(filename)
+        self.oven.cook_window(
+            self._first_cooked_date(self.date_range), until_date=self.date_range.end,
+            checkpoint=self._load_cooked_cache(content_hash)
+        )
+        self._save_cooked_cache(content_hash)
         self._restore_preferences_after_load()
         self.notify('document_changed')
         self._undoer.set_save_point()
@@ -1213,6 +1342,7 @@ class Document(BaseDocument, Repeater, GUIObject):
             self.transactions, self.schedules, self.budgets
         )
         if not autosave:
+            self._save_cooked_cache(self._content_hash(filename))
             self._undoer.set_save_point()
             self._dirty_flag = False
 
@@ -1271,14 +1401,19 @@ class Document(BaseDocument, Repeater, GUIObject):
             self.accounts.add(account)
         if target_account is not ref_account and ref_account.reference is not None:
             target_account.reference = ref_account.reference
+            self.accounts.reindex_account(target_account)
         for entry, ref in matches:
             if ref is not None:
+                old_date = ref.transaction.date
                 ref.transaction.date = entry.date
                 ref.split.amount = entry.split.amount
                 ref.transaction.balance(strong_split=ref.split, keep_two_splits=True)
                 ref.split.reference = entry.split.reference
+                self.transactions.reindex_transaction(ref.transaction, old_date)
             else:
                 if entry.transaction not in self.transactions:
+                    # Imports are parsed in their own string pool, we only merge what is imported.
+                    entry.transaction.intern_strings(self.string_pool)
                     self.transactions.add(entry.transaction)
         self._cook()
         self.notify('transactions_imported')
@@ -1378,6 +1513,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self.stop_edition()
         self.notify('date_range_will_change')
         self._date_range = date_range
+        self.oven.cook_history(self._first_cooked_date(date_range))
         self.oven.continue_cooking(date_range.end)
         self.notify('date_range_changed')
 
@@ -1393,8 +1529,8 @@ class Document(BaseDocument, Repeater, GUIObject):
     def undo(self):
         """Undo the last undoable action."""
         self.stop_edition()
-        self._undoer.undo()
-        self._cook()
+        from_date, affected_accounts = self._undoer.undo()
+        self._cook(from_date=from_date, affected_accounts=affected_accounts)
         self.notify('performed_undo_or_redo')
 
     def can_redo(self):
@@ -1408,8 +1544,8 @@ class Document(BaseDocument, Repeater, GUIObject):
     def redo(self):
         """Redo the last redoable action."""
         self.stop_edition()
-        self._undoer.redo()
-        self._cook()
+        from_date, affected_accounts = self._undoer.redo()
+        self._cook(from_date=from_date, affected_accounts=affected_accounts)
         self.notify('performed_undo_or_redo')
 
     # --- Misc
@@ -1561,6 +1697,7 @@ class ImportDocument(BaseDocument):
         self.schedules = loader.schedules
         self.budgets = loader.budgets
         self.oven = loader.oven
+        self.string_pool = loader.string_pool
 
     @property
     def ahead_months(self):
@@ -1586,6 +1723,6 @@ class ImportDocument(BaseDocument):
         self.cook_flag = True
         self.oven.cook(from_date=None, until_date=None)
 
-    def _cook(self, from_date=None):
+    def _cook(self, from_date=None, affected_accounts=None):
         pass
 
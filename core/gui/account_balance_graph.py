@@ -22,6 +22,11 @@ class AccountBalanceGraph(BalanceGraph):
         entry = self._account.entries.last_entry(date=date)
         return entry.normal_balance() if entry else 0
 
+    def _balance_change_dates(self, date_range):
+        if self._account is None:
+            return []
+        return self._account.entries.dates_in_range(date_range)
+
     def _budget_for_date(self, date):
         date_range = DateRange(date.min, date)
         return self.document.budgeted_amount_for_target(
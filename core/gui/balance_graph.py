@@ -30,12 +30,20 @@ class BalanceGraph(Graph):
     def _budget_for_date(self, date):
         return 0
 
+    def _balance_change_dates(self, date_range):
+        # Returns the dates in date_range at which _balance_for_date() can possibly change. If we
+        # can't tell, return None and every single day of the range will be looked at.
+        return None
+
     # --- Override
     # Computation Notes: When the balance in the graph changes, we have to create a flat line until
     # one day prior to the change. However, when budgets are involved, the line is *not* flattened.
     # To save some calculations (in a year range, those take a lot of time if they're made every day),
     # rather than calculating the budget every day, they are only calculated when the balance without
     # budget changes. this is what the algorithm below reflects.
+    # Moreover, when we know at which dates the balance can change (see _balance_change_dates()), we
+    # only look at those dates (plus today and the end of the range). On every other day, the balance
+    # is the same as the day before, so nothing would happen there anyway.
     def compute_data(self):
         date_range = self.document.date_range
         TODAY = date.today()
@@ -43,7 +51,16 @@ class BalanceGraph(Graph):
         last_balance = self._balance_for_date(date_range.start - ONE_DAY)
         if last_balance:
             date2value[date_range.start] = last_balance
-        for date_point in date_range:
+        change_dates = self._balance_change_dates(date_range)
+        if change_dates is None:
+            date_points = date_range
+        else:
+            date_points = set(change_dates)
+            date_points.add(date_range.end)
+            if TODAY in date_range:
+                date_points.add(TODAY)
+            date_points = sorted(date_points)
+        for date_point in date_points:
             balance = self._balance_for_date(date_point)
             if (balance != last_balance) or (date_point == TODAY) or (date_point == date_range.end):
                 if date2value and last_balance != balance:
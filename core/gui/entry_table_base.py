@@ -12,7 +12,7 @@ from operator import attrgetter
 from hscommon.util import nonone
 from hscommon.trans import tr
 
-from ..model.amount import convert_amount
+from ..model.amount import convert_amounts, sum_converted_amounts
 from ..model.date import ONE_DAY
 from ..model.entry import Entry
 from ..model.recurrence import Spawn
@@ -392,15 +392,12 @@ class EntryTableBase(TransactionTableBase):
                 balance = prev_entry.balance_with_budget
                 rbalance = prev_entry.reconciled_balance
                 result.append(PreviousBalanceRow(self, date_range.start, balance, rbalance, account))
-        total_debit = 0
-        total_credit = 0
         entries = self.mainwindow.visible_entries_for_account(account)
-        for entry in entries:
-            row = self.ENTRY_ROWCLASS(self, entry, account)
-            result.append(row)
-            convert = lambda a: convert_amount(a, account.currency, entry.date)
-            total_debit += convert(row._debit)
-            total_credit += convert(row._credit)
+        rows = [self.ENTRY_ROWCLASS(self, entry, account) for entry in entries]
+        result += rows
+        dates = [entry.date for entry in entries]
+        total_debit = sum_converted_amounts([row._debit for row in rows], account.currency, dates)
+        total_credit = sum_converted_amounts([row._credit for row in rows], account.currency, dates)
         if result:
             total_row = TotalRow(self, account, date_range.end, total_debit, total_credit)
             result.append(total_row)
@@ -421,7 +418,7 @@ class EntryTableBase(TransactionTableBase):
         selected = len(entries)
         total = sum(1 for row in self if isinstance(row, EntryTableRow))
         total_currency = self._get_totals_currency()
-        amounts = [convert_amount(e.amount, total_currency, e.date) for e in entries]
+        amounts = convert_amounts([e.amount for e in entries], total_currency, [e.date for e in entries])
         total_debit = sum(a for a in amounts if a > 0)
         total_credit = abs(sum(a for a in amounts if a < 0))
         return (selected, total, total_debit, total_credit)
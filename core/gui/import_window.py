@@ -400,6 +400,8 @@ class ImportWindow(MainWindowGUIObject):
             import_action.perform_action(*action_param)
 
         for pane in panes:
+            # Plugins are free to change the dates of the transactions they're given directly.
+            pane.import_document.transactions.reindex()
             if not pane.import_document.cook_flag:
                 pane.import_document.cook()
 
@@ -19,6 +19,15 @@ class NetWorthGraph(BalanceGraph, SheetViewNotificationsMixin):
         balances = (a.entries.balance(date=date, currency=self._currency) for a in self._accounts)
         return sum(balances)
     
+    def _balance_change_dates(self, date_range):
+        result = set()
+        for account in self._accounts:
+            if account.currency != self._currency and account.entries:
+                # Converted balances change with exchange rates, which can change every day.
+                return None
+            result.update(account.entries.dates_in_range(date_range))
+        return result
+    
     def _budget_for_date(self, date):
         date_range = DateRange(date.min, date)
         return self.document.budgeted_amount_for_target(None, date_range)
@@ -11,7 +11,7 @@ from operator import attrgetter
 
 from hscommon.trans import trget, tr
 from hscommon.gui.column import Column
-from ..model.amount import convert_amount
+from ..model.amount import sum_converted_amounts
 from ..model.recurrence import Spawn
 from ..model.transaction import Transaction
 from .table import Row, RowWithDateMixIn, rowattr
@@ -55,13 +55,15 @@ class TransactionTable(TransactionTableBase):
 
     def _fill(self):
         self._all_amounts_are_native = True
-        total_amount = 0
-        for transaction in self.parent_view.visible_transactions:
+        transactions = self.parent_view.visible_transactions
+        for transaction in transactions:
             self.append(TransactionTableRow(self, transaction))
-            convert = lambda a: convert_amount(a, self.document.default_currency, transaction.date)
-            total_amount += convert(transaction.amount)
             if not self.document.is_amount_native(transaction.amount):
                 self._all_amounts_are_native = False
+        total_amount = sum_converted_amounts(
+            [t.amount for t in transactions], self.document.default_currency,
+            [t.date for t in transactions]
+        )
         self.footer = TotalRow(self, self.document.date_range.end, total_amount)
         self._restore_from_explicit_selection(refresh_view=False)
 
@@ -81,7 +81,8 @@ class TransactionView(BaseView, ViewWithTransactionsMixin):
             return
         if query_string:
             query = self.app.parse_search_query(query_string)
-            txns = [t for t in txns if t.matches(query)]
+            is_matching = self.document.transactions.matcher(query)
+            txns = [t for t in txns if is_matching(t)]
         if filter_type is FilterType.Unassigned:
             txns = [t for t in txns if t.has_unassigned_split]
         elif filter_type is FilterType.Income:
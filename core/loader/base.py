@@ -20,7 +20,7 @@ from ..model.budget import Budget
 from ..model.currency import Currency
 from ..model.oven import Oven
 from ..model.recurrence import Recurrence, Spawn
-from ..model.transaction import Transaction, Split
+from ..model.transaction import Transaction, Split, StringPool
 from ..model.transaction_list import TransactionList
 
 # date formats to use for format guessing
@@ -67,9 +67,12 @@ class Loader:
     # fall back to the default currency
     STRICT_CURRENCY = False
 
-    def __init__(self, default_currency, default_date_format=None):
+    def __init__(self, default_currency, default_date_format=None, string_pool=None):
         self.default_currency = default_currency
         self.default_date_format = default_date_format
+        # Loaded descriptions, payees and memos are interned in there. Give the document's pool to
+        # share strings with it.
+        self.string_pool = string_pool if string_pool is not None else StringPool()
         self.groups = GroupList()
         self.accounts = AccountList(default_currency)
         self.transactions = TransactionList()
@@ -237,14 +240,20 @@ class Loader:
             ).format(e.currency)
             raise FileFormatError(msg)
 
-    def load(self):
+    def load(self, cook=True):
         """Loads the parsed info into self.accounts and self.transactions.
 
         You must have called parse() before calling this.
+
+        Unless ``cook`` is false, we also :ref:`cook <cooking>` the loaded data so that accounts
+        have their entries. Don't cook if the loaded data is going to be cooked by someone else
+        anyway.
         """
+        intern = self.string_pool.intern
+
         def load_transaction_info(info):
-            description = info.description
-            payee = info.payee
+            description = intern(nonone(info.description, ''))
+            payee = intern(nonone(info.payee, ''))
             checkno = info.checkno
             date = info.date
             transaction = Transaction(date, description, payee, checkno)
@@ -254,7 +263,7 @@ class Loader:
                 amount = split_info.amount
                 if split_info.amount_reversed:
                     amount = -amount
-                memo = nonone(split_info.memo, '')
+                memo = intern(nonone(split_info.memo, ''))
                 split = Split(transaction, account, amount)
                 split.memo = memo
                 if account is None or not of_currency(amount, account.currency):
@@ -374,7 +383,8 @@ class Loader:
                 budget.repeat_every = info.repeat_every
             self.budgets.append(budget)
         self._post_load()
-        self.oven.cook(datetime.date.min, until_date=None)
+        if cook:
+            self.oven.cook(datetime.date.min, until_date=None)
         Currency.get_rates_db().ensure_rates(start_date, [x.code for x in currencies])
 
 
@@ -30,8 +30,8 @@ MERGABLE_FIELDS = {CsvField.Description, CsvField.Payee}
 class Loader(base.Loader):
     FILE_OPEN_MODE = 'rb'
 
-    def __init__(self, default_currency, default_date_format=None):
-        base.Loader.__init__(self, default_currency, default_date_format)
+    def __init__(self, default_currency, default_date_format=None, string_pool=None):
+        base.Loader.__init__(self, default_currency, default_date_format, string_pool)
         self.columns = []
         self.lines = []
         self.dialect = None # last used dialect
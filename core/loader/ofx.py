@@ -19,9 +19,9 @@ class Loader(SGMLParser, base.Loader):
     FILE_ENCODING = 'cp1252'
     NATIVE_DATE_FORMAT = '%Y%m%d'
 
-    def __init__(self, default_currency, default_date_format=None):
+    def __init__(self, default_currency, default_date_format=None, string_pool=None):
         SGMLParser.__init__(self)
-        base.Loader.__init__(self, default_currency, default_date_format)
+        base.Loader.__init__(self, default_currency, default_date_format, string_pool)
         self.data = ''
         self.data_handler = None
 
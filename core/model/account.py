@@ -158,13 +158,66 @@ class AccountList(list):
     ``default_currency`` is the currency that we want new accounts (created in :meth:`find`) to
     have.
 
+    To make :meth:`find` and :meth:`find_reference` fast, accounts are indexed by normalized name,
+    account number and reference. Changing one of those attributes on an account that is in the
+    list must be done through :meth:`set_account_name` or be followed by a
+    :meth:`reindex_account` call.
+
     Subclasses ``list``.
     """
     def __init__(self, default_currency):
         list.__init__(self)
         self.default_currency = default_currency
         self.auto_created = set()
+        self._clear_index()
+
+    # --- Private
+    def _clear_index(self):
+        # Each of these dicts map a key to the list of accounts having that key, in list order.
+        self._name2accounts = {}
+        self._number2accounts = {}
+        self._reference2accounts = {}
+        # account: (order, name key, number key, reference key). order is used to know which account
+        # comes first in the list.
+        self._account2keys = {}
+        self._next_order = 0
+
+    def _account_order(self, account):
+        return self._account2keys[account][0]
+
+    def _add_to_index(self, index, key, account):
+        accounts = index.setdefault(key, [])
+        accounts.append(account)
+        if len(accounts) > 1:
+            accounts.sort(key=self._account_order)
+
+    def _index_account(self, account, order):
+        name_key = account.name.lower().strip()
+        number_key = account.account_number
+        reference_key = account.reference
+        self._account2keys[account] = (order, name_key, number_key, reference_key)
+        self._add_to_index(self._name2accounts, name_key, account)
+        if number_key:
+            self._add_to_index(self._number2accounts, number_key, account)
+        if reference_key is not None:
+            self._add_to_index(self._reference2accounts, reference_key, account)
+
+    def _unindex_account(self, account):
+        order, name_key, number_key, reference_key = self._account2keys.pop(account)
+        index_and_keys = [
+            (self._name2accounts, name_key),
+            (self._number2accounts, number_key),
+            (self._reference2accounts, reference_key),
+        ]
+        for index, key in index_and_keys:
+            accounts = index.get(key)
+            if accounts and account in accounts:
+                accounts.remove(account)
+                if not accounts:
+                    del index[key]
+        return order
 
+    # --- Public
     def add(self, account):
         """Adds ``account`` to the list.
 
@@ -172,10 +225,13 @@ class AccountList(list):
         """
         if self.find_reference(account.reference) is None:
             list.append(self, account)
+            self._index_account(account, self._next_order)
+            self._next_order += 1
 
     def clear(self):
         """Removes all elements from the list."""
         del self[:]
+        self._clear_index()
 
     def filter(self, group=NOT_GIVEN, type=NOT_GIVEN):
         """Returns all accounts of the given ``type`` and/or ``group``.
@@ -193,15 +249,23 @@ class AccountList(list):
     def find(self, name, auto_create_type=None):
         """Returns the first account matching with ``name`` (case insensitive)
 
+        An account also matches if ``name`` starts with its :attr:`Account.account_number`.
+
         If ``auto_create_type`` is not ``None`` and no account is found, create an account of type
         ``auto_create_type`` and return it.
         """
         normalized = name.lower().strip()
-        for account in self:
-            if account.name.lower().strip() == normalized:
-                return account
-            elif account.account_number and normalized.startswith(account.account_number):
-                return account
+        candidates = []
+        accounts = self._name2accounts.get(normalized)
+        if accounts:
+            candidates.append(accounts[0])
+        if self._number2accounts:
+            for length in range(1, len(normalized) + 1):
+                accounts = self._number2accounts.get(normalized[:length])
+                if accounts:
+                    candidates.append(accounts[0])
+        if candidates:
+            return min(candidates, key=self._account_order)
         if auto_create_type:
             account = Account(name.strip(), self.default_currency, type=auto_create_type)
             self.add(account)
@@ -212,9 +276,9 @@ class AccountList(list):
         """Returns the account with ``reference`` or ``None`` if it isn't there."""
         if reference is None:
             return None
-        for account in self:
-            if account.reference == reference:
-                return account
+        accounts = self._reference2accounts.get(reference)
+        if accounts:
+            return accounts[0]
 
     def has_multiple_currencies(self):
         """Returns whether there's at least one account with a different currency.
@@ -231,10 +295,22 @@ class AccountList(list):
         """
         return new_name(base_name, self.find)
 
+    def reindex_account(self, account):
+        """Updates our lookup indexes after a change to ``account``'s name, number or reference.
+
+        Does nothing if ``account`` isn't in the list.
+        """
+        if account not in self._account2keys:
+            return
+        order = self._unindex_account(account)
+        self._index_account(account, order)
+
     def remove(self, account):
         """Removes ``account`` from the list."""
         list.remove(self, account)
         self.auto_created.discard(account)
+        if account in self._account2keys:
+            self._unindex_account(account)
 
     def set_account_name(self, account, new_name):
         """Rename ``account`` to ``new_name``.
@@ -247,6 +323,7 @@ class AccountList(list):
         if (other is not None) and (other is not account):
             raise DuplicateAccountNameError()
         account.name = new_name.strip()
+        self.reindex_account(account)
 
 
 class GroupList(list):
@@ -244,6 +244,39 @@ def convert_amount(amount, target_currency, date):
     exchange_rate = currency.value_in(target_currency, date)
     return Amount(amount.value * exchange_rate, target_currency)
 
+def convert_amounts(amounts, target_currency, dates):
+    """Returns a list of ``amounts`` converted to ``target_currency`` using ``dates`` exchange rates.
+
+    This is the same as calling :func:`convert_amount` for each amount with its corresponding date,
+    but exchange rates are looked up only once per currency and date.
+
+    :param amounts: list of :class:`Amount`
+    :param target_currency: :class:`.Currency`
+    :param dates: list of ``datetime.date``, with the same length as ``amounts``.
+    """
+    currency2dates = {}
+    for amount, date in zip(amounts, dates):
+        if amount and amount.currency != target_currency:
+            currency2dates.setdefault(amount.currency, set()).add(date)
+    currency2rates = {
+        currency: currency.values_in(target_currency, currency_dates)
+        for currency, currency_dates in currency2dates.items()
+    }
+    result = []
+    for amount, date in zip(amounts, dates):
+        if amount and amount.currency != target_currency:
+            exchange_rate = currency2rates[amount.currency][date]
+            amount = Amount(amount.value * exchange_rate, target_currency)
+        result.append(amount)
+    return result
+
+def sum_converted_amounts(amounts, target_currency, dates):
+    """Returns the sum of ``amounts`` converted to ``target_currency`` using ``dates`` exchange rates.
+
+    .. seealso:: :func:`convert_amounts`
+    """
+    return sum(convert_amounts(amounts, target_currency, dates))
+
 def prorate_amount(amount, spread_over_range, wanted_range):
     """Returns the prorated part of ``amount`` spread over ``spread_over_range`` for the ``wanted_range``.
 
@@ -6,10 +6,10 @@
 # which should be included with this package. The terms are also available at 
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from datetime import date
 
-from hscommon.util import extract
-
 from .amount import prorate_amount
 from .date import DateRange, ONE_DAY
 from .recurrence import Recurrence, Spawn, DateCounter, RepeatType
@@ -22,6 +22,42 @@ class BudgetSpawn(Spawn):
     """
     is_budget = True
 
+class AccountTransactionIndex:
+    """Transactions affecting a set of accounts, sorted by date for each account.
+
+    Allows :meth:`Budget.get_spawns` to fetch the transactions of a spawn's period without going
+    through all transactions for each period.
+
+    :param transactions: Transactions to index, in any order.
+    :type transactions: list of :class:`.Transaction`
+    :param accounts: Accounts for which we index transactions. Others are ignored.
+    :type accounts: set of :class:`.Account`
+    """
+    def __init__(self, transactions, accounts):
+        account2txns = defaultdict(list)
+        for txn in transactions:
+            for account in txn.affected_accounts():
+                if account in accounts:
+                    account2txns[account].append(txn)
+        self._account2txns = {}
+        self._account2dates = {}
+        for account, txns in account2txns.items():
+            txns.sort(key=lambda t: t.date)
+            self._account2txns[account] = txns
+            self._account2dates[account] = [t.date for t in txns]
+
+    def transactions_in_range(self, account, start_date, end_date):
+        """Returns transactions affecting ``account`` from ``start_date`` to ``end_date``.
+
+        Both bounds are inclusive. Transactions are returned in date order.
+        """
+        dates = self._account2dates.get(account)
+        if not dates:
+            return []
+        start = bisect_left(dates, start_date)
+        end = bisect_right(dates, end_date, start)
+        return self._account2txns[account][start:end]
+
 class Budget(Recurrence):
     """Regular budget for a specific account.
 
@@ -65,18 +101,30 @@ class Budget(Recurrence):
         # `recurrence_date` is the date at which the budget *starts*.
         # We need a date counter to see which date is next (so we can know when our period ends
         date_counter = DateCounter(recurrence_date, self.repeat_type, self.repeat_every, date.max)
-        next(date_counter) # first next() is the start_date
-        end_date = next(date_counter) - ONE_DAY
+        end_date = date_counter.date_at(date_counter.index_from(recurrence_date + ONE_DAY)) - ONE_DAY
         return BudgetSpawn(self, ref, recurrence_date=recurrence_date, date=end_date)
     
-    def get_spawns(self, end, transactions, consumedtxns):
+    def _spawn_start(self):
+        # We only keep spawns ending after today (see get_spawns()), so we can start spawning at the
+        # period containing tomorrow, that is, the period before the first one starting after
+        # tomorrow.
+        if self.date2exception or self.date2globalchange:
+            return self.start_date
+        date_counter = DateCounter(self.start_date, self.repeat_type, self.repeat_every, date.max)
+        index = date_counter.index_from(date.today() + ONE_DAY * 2) - 1
+        while index > 0 and date_counter.date_at(index) is None:
+            index -= 1
+        return date_counter.date_at(max(index, 0))
+    
+    def get_spawns(self, end, txn_index, consumedtxns):
         """Returns the list of transactions spawned by our budget.
 
         Works pretty much like :meth:`core.model.recurrence.Recurrence.get_spawns`, except for the
         extra arguments.
 
-        :param transactions: Transactions that can affect our budget spawns' final amount.
-        :type transactions: list of :class:`.Transaction`
+        :param txn_index: Transactions that can affect our budget spawns' final amount. Our account
+                          has to be part of the indexed accounts.
+        :type txn_index: :class:`AccountTransactionIndex`
         :param consumedtxns: Transactions that have already been "consumed" by a budget spawn in
                              this current round of spawning (one a budget "ate" a transaction, we
                              don't have it affect another). This set is going to be mutated
@@ -89,12 +137,11 @@ class Budget(Recurrence):
         spawns = [spawn for spawn in spawns if spawn.date > date.today()]
         account = self.account
         budget_amount = self.amount if account.is_debit_account() else -self.amount
-        relevant_transactions = set(t for t in transactions if account in t.affected_accounts())
-        relevant_transactions -= consumedtxns
         for spawn in spawns:
-            affects_spawn = lambda t: spawn.recurrence_date <= t.date <= spawn.date
-            wheat, shaft = extract(affects_spawn, relevant_transactions)
-            relevant_transactions = shaft
+            wheat = [
+                t for t in txn_index.transactions_in_range(account, spawn.recurrence_date, spawn.date)
+                if t not in consumedtxns
+            ]
             txns_amount = sum(t.amount_for_account(account, budget_amount.currency) for t in wheat)
             if abs(txns_amount) < abs(budget_amount):
                 spawn_amount = budget_amount - txns_amount
@@ -103,7 +150,7 @@ class Budget(Recurrence):
                     spawn.set_splits([Split(spawn, account, spawn_amount), Split(spawn, self.target, -spawn_amount)])
             else:
                 spawn.set_splits([])
-            consumedtxns |= set(wheat)
+            consumedtxns.update(wheat)
         self._previous_spawns = spawns
         return spawns
     
@@ -140,6 +140,26 @@ class Currency:
         else:
             return self.get_rates_db().get_rate(date, self.code, currency.code)
 
+    def values_in(self, currency, dates):
+        """Returns a ``{date: value}`` dict of the values of this currency in terms of the other
+        currency for each of ``dates``.
+
+        This is the same as calling :meth:`value_in` for each date, but rates are looked up in bulk.
+        """
+        result = {}
+        db_dates = []
+        for rate_date in dates:
+            if self.start_date is not None and rate_date < self.start_date:
+                result[rate_date] = self.start_rate
+            elif self.stop_date is not None and rate_date > self.stop_date:
+                result[rate_date] = self.latest_rate
+            else:
+                db_dates.append(rate_date)
+        if db_dates:
+            rates = self.get_rates_db().get_rates(db_dates, self.code, currency.code)
+            result.update(zip(db_dates, rates))
+        return result
+
     def set_CAD_value(self, value, date):
         """Sets the currency's value in CAD on the given date."""
         self.get_rates_db().set_CAD_value(date, self.code, value)
@@ -159,6 +179,62 @@ CAD = Currency.register('CAD', 'Canadian dollar', latest_rate=1)
 def date2str(date):
     return '%d%02d%02d' % (date.year, date.month, date.day)
 
+def str2ordinal(s):
+    return date(int(s[:4]), int(s[4:6]), int(s[6:8])).toordinal()
+
+class RatesTable:
+    """In-memory copy of all rates of a currency, indexed by day ordinal.
+
+    Rates are kept in a contiguous list going from the first date we have a rate for to the last
+    one. Days without a rate hold the rate of the closest previous day having one. Days before our
+    first rate get the first rate and days after our last rate get the last one.
+    """
+    def __init__(self):
+        self.start = None # ordinal of our first rate
+        self.rates = []
+        # For each day, whether the rate was explicitly set (1) or filled from a previous day (0).
+        self.is_set = bytearray()
+
+    def get(self, ordinal):
+        """Returns the rate at ``ordinal`` or ``None`` if we have no rates at all."""
+        if not self.rates:
+            return None
+        index = ordinal - self.start
+        if index < 0:
+            return self.rates[0]
+        elif index >= len(self.rates):
+            return self.rates[-1]
+        else:
+            return self.rates[index]
+
+    def set(self, ordinal, rate):
+        """Sets the rate at ``ordinal`` and fills the following days that depend on it."""
+        if not self.rates:
+            self.start = ordinal
+            self.rates.append(rate)
+            self.is_set.append(1)
+            return
+        end = self.start + len(self.rates) - 1
+        if ordinal > end:
+            gap = ordinal - end - 1
+            self.rates.extend([self.rates[-1]] * gap)
+            self.rates.append(rate)
+            self.is_set.extend(bytes(gap))
+            self.is_set.append(1)
+        elif ordinal < self.start:
+            gap = self.start - ordinal - 1
+            self.rates[:0] = [rate] * (gap + 1)
+            self.is_set[:0] = b'\x01' + bytes(gap)
+            self.start = ordinal
+        else:
+            index = ordinal - self.start
+            self.rates[index] = rate
+            self.is_set[index] = 1
+            index += 1
+            while index < len(self.rates) and not self.is_set[index]:
+                self.rates[index] = rate
+                index += 1
+
 class RatesDB:
     """Stores exchange rates for currencies.
 
@@ -166,7 +242,7 @@ class RatesDB:
     The rates are represented as float and represent the value of the currency in CAD.
     """
     def __init__(self, db_or_path=':memory:', async=True):
-        self._cache = {} # {(date, currency): CAD value
+        self._cache = {} # {currency: RatesTable}
         self.db_or_path = db_or_path
         if isinstance(db_or_path, str):
             self.con = sqlite.connect(str(db_or_path))
@@ -179,6 +255,12 @@ class RatesDB:
         self._fetched_ranges = {} # a currency --> (start, end) map
 
     def _execute(self, *args, **kwargs):
+        return self._run_sql('execute', *args, **kwargs)
+
+    def _executemany(self, *args, **kwargs):
+        return self._run_sql('executemany', *args, **kwargs)
+
+    def _run_sql(self, method_name, *args, **kwargs):
         def create_tables():
             # date is stored as a TEXT YYYYMMDD
             sql = "create table rates(date TEXT, currency TEXT, rate REAL NOT NULL)"
@@ -187,7 +269,7 @@ class RatesDB:
             self.con.execute(sql)
 
         try:
-            return self.con.execute(*args, **kwargs)
+            return getattr(self.con, method_name)(*args, **kwargs)
         except sqlite.OperationalError: # new db, or other problems
             try:
                 create_tables()
@@ -204,20 +286,23 @@ class RatesDB:
             else:
                 self.con = sqlite.connect(':memory:')
             create_tables()
-        return self.con.execute(*args, **kwargs) # try again
+        return getattr(self.con, method_name)(*args, **kwargs) # try again
 
-    def _seek_value_in_CAD(self, str_date, currency_code):
+    def _get_CAD_value(self, date, currency_code):
         if currency_code == 'CAD':
             return 1
-
-        def seek(date_op, desc):
-            sql = "select rate from rates where date %s ? and currency = ? order by date %s limit 1" % (date_op, desc)
-            cur = self._execute(sql, [str_date, currency_code])
-            row = cur.fetchone()
-            if row:
-                return row[0]
-
-        return seek('<=', 'desc') or seek('>=', '') or Currency(currency_code).latest_rate
+        try:
+            table = self._cache[currency_code]
+        except KeyError:
+            table = RatesTable()
+            sql = "select date, rate from rates where currency = ? order by date"
+            for str_date, rate in self._execute(sql, [currency_code]):
+                table.set(str2ordinal(str_date), rate)
+            self._cache[currency_code] = table
+        value = table.get(date.toordinal())
+        if not value:
+            value = Currency(currency_code).latest_rate
+        return value
 
     def _ensure_filled(self, date_start, date_end, currency_code):
         """Make sure that the cache contains *something* for each of the dates in the range.
@@ -225,35 +310,62 @@ class RatesDB:
         Sometimes, our provider doesn't return us the range we sought. When it does, it usually
         means that it never will and to avoid repeatedly querying those ranges forever, we have to
         fill them. We use the closest rate for this.
+
+        The filled rates are not committed.
         """
         # We don't want to fill today, because we want to repeatedly fetch that one until the
         # provider gives it to us.
         if date_end >= date.today():
             date_end = date.today() - timedelta(1)
-        sql = "select rate from rates where date = ? and currency = ?"
-        for curdate in iterdaterange(date_start, date_end):
-            cur = self._execute(sql, [date2str(curdate), currency_code])
-            if cur.fetchone() is None:
-                nearby_rate = self._seek_value_in_CAD(date2str(curdate), currency_code)
-                self.set_CAD_value(curdate, currency_code, nearby_rate)
-                logging.debug("Filled currency void for %s at %s (value: %2.2f)", currency_code, curdate, nearby_rate)
+        if date_start > date_end:
+            return
+        sql = "select date from rates where currency = ? and date >= ? and date <= ?"
+        cur = self._execute(sql, [currency_code, date2str(date_start), date2str(date_end)])
+        existing_dates = {row[0] for row in cur}
+        missing_dates = [d for d in iterdaterange(date_start, date_end) if date2str(d) not in existing_dates]
+        if not missing_dates:
+            return
+        # We compute all values before storing them so that a filled value doesn't influence the
+        # others. It gives the same result as filling day by day because a day without a rate gets
+        # the rate of the previous day.
+        values = [(d, self._get_CAD_value(d, currency_code)) for d in missing_dates]
+        self._store_rates(currency_code, values)
+        logging.debug(
+            "Filled %d currency voids for %s between %s and %s",
+            len(values), currency_code, date_start, date_end
+        )
 
     def _save_fetched_rates(self):
         while True:
             try:
                 rates, currency, fetch_start, fetch_end = self._fetched_values.get_nowait()
                 logging.debug("Saving %d rates for the currency %s", len(rates), currency)
+                values = []
                 for rate_date, rate in rates:
                     if not rate:
                         logging.debug("Empty rate for %s. Skipping", rate_date)
                         continue
-                    logging.debug("Saving rate %2.2f for %s", rate, rate_date)
-                    self.set_CAD_value(rate_date, currency, rate)
+                    values.append((rate_date, rate))
+                self._store_rates(currency, values)
                 self._ensure_filled(fetch_start, fetch_end, currency)
+                self.con.commit()
                 logging.debug("Finished saving rates for currency %s", currency)
             except Empty:
                 break
 
+    def _store_rates(self, currency_code, values):
+        # Stores a list of (date, CAD value) for currency without committing them.
+        if not values:
+            return
+        sql = "replace into rates(date, currency, rate) values(?, ?, ?)"
+        self._executemany(sql, [(date2str(d), currency_code, rate) for d, rate in values])
+        # The rates table also updates the days that were filled from those dates' rates (dates
+        # when the currency server has no rates). Other currencies are left alone.
+        if currency_code in self._cache:
+            table = self._cache[currency_code]
+            for d, rate in values:
+                table.set(d.toordinal(), rate)
+
     def clear_cache(self):
         self._cache = {}
 
@@ -284,34 +396,26 @@ class RatesDB:
         if not self._fetched_values.empty():
             self._save_fetched_rates()
         # This method is a bottleneck and has been optimized for speed.
-        value1 = None
-        value2 = None
-        if currency1_code == 'CAD':
-            value1 = 1
-        else:
-            value1 = self._cache.get((date, currency1_code))
-        if currency2_code == 'CAD':
-            value2 = 1
-        else:
-            value2 = self._cache.get((date, currency2_code))
-        if value1 is None or value2 is None:
-            str_date = date2str(date)
-            if value1 is None:
-                value1 = self._seek_value_in_CAD(str_date, currency1_code)
-                self._cache[(date, currency1_code)] = value1
-            if value2 is None:
-                value2 = self._seek_value_in_CAD(str_date, currency2_code)
-                self._cache[(date, currency2_code)] = value2
+        value1 = self._get_CAD_value(date, currency1_code)
+        value2 = self._get_CAD_value(date, currency2_code)
         return value1 / value2
 
+    def get_rates(self, dates, currency1_code, currency2_code):
+        """Returns a list of exchange rates between currency1 and currency2 for each of ``dates``.
+
+        This is the same as calling :meth:`get_rate` for each date, but faster.
+        """
+        if not self._fetched_values.empty():
+            self._save_fetched_rates()
+        get_value = self._get_CAD_value
+        return [
+            get_value(date, currency1_code) / get_value(date, currency2_code)
+            for date in dates
+        ]
+
     def set_CAD_value(self, date, currency_code, value):
         """Sets the daily value in CAD for currency at date"""
-        # we must clear the whole cache because there might be other dates affected by this change
-        # (dates when the currency server has no rates).
-        self.clear_cache()
-        str_date = date2str(date)
-        sql = "replace into rates(date, currency, rate) values(?, ?, ?)"
-        self._execute(sql, [str_date, currency_code, value])
+        self._store_rates(currency_code, [(date, value)])
         self.con.commit()
 
     def register_rate_provider(self, rate_provider):
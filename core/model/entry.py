@@ -9,11 +9,25 @@
 import bisect
 import datetime
 from collections import defaultdict, Sequence
-from itertools import takewhile
 
-from hscommon.util import flatten
 from .amount import convert_amount, same_currency
 
+# Every this many entries, EntryList remembers its last reconciled entry so far. This way, it
+# doesn't have to look at all its entries to find the last reconciled one when it's truncated.
+RECONCILED_CHECKPOINT_INTERVAL = 256
+
+def reconciliation_order_key(split):
+    """Returns the key with which splits are sorted when computing reconciled balances.
+
+    Unlike :attr:`Entry.reconciliation_key`, which puts unreconciled entries first (with
+    ``date.min``), unreconciled splits are placed at their transaction date. This is the order in
+    which the oven accumulates reconciled balances.
+    """
+    rdate = split.reconciliation_date
+    if rdate is None:
+        rdate = split.transaction.date
+    return (rdate, split.transaction.date, split.transaction.position)
+
 class Entry:
     """Wrapper around a :class:`.Split` to show in an :class:`.Account` ledger.
 
@@ -27,6 +41,9 @@ class Entry:
     Most entries are created by the :class:`.Oven`, which does the necessary calculations to compute
     running total information that the entry needs on init.
     """
+    # Entries are created for every split at every cook, see Transaction.__slots__
+    __slots__ = ['split', 'amount', 'balance', 'reconciled_balance', 'balance_with_budget', 'index']
+
     def __init__(self, split, amount, balance, reconciled_balance, balance_with_budget):
         #: The :class:`.Split` our entry wraps.
         self.split = split
@@ -159,6 +176,11 @@ class EntryList(Sequence):
     The main roles of this class is to manage entry order as well as managing "last entries" to be
     able to easily answer questions like "What's the running total of the last entry at date X?"
 
+    The :class:`.Oven` can leave the entries before a certain date uncooked (see
+    :meth:`set_history`). Our last entry before that date then stands in for all of them. Methods
+    answering questions about dates before that are answered after having the oven cook that
+    history, as is any access to the entries as a sequence.
+
     :param account: :class:`.Account` for which we manage entries.
     """
     def __init__(self, account):
@@ -167,20 +189,33 @@ class EntryList(Sequence):
         self._entries = []
         self._date2entries = defaultdict(list)
         self._sorted_entry_dates = []
-        # the key for this dict is (date_range, currency)
-        self._daterange2cashflow = {}
+        # For each currency, a list aligned with _sorted_entry_dates where each item is the
+        # cumulative (non-budget) cash flow up to, and including, that date. These lists are filled
+        # lazily by _cumulative_cash_flow() and truncated when entries change.
+        self._currency2cumulative_cashflow = {}
         self._last_reconciled = None
+        # Item N is what _last_reconciled was before we added entry N * RECONCILED_CHECKPOINT_INTERVAL
+        self._reconciled_checkpoints = []
+        # Entries reconciled after their date. They might come after entries of later dates in
+        # reconciliation order.
+        self._late_reconciled = []
+        self._clear_history()
+
+    def __bool__(self):
+        return bool(self._entries) or self._history_entry is not None
 
     def __getitem__(self, key):
+        self._ensure_cooked(datetime.date.min)
         return self._entries.__getitem__(key)
 
     def __len__(self):
+        self._ensure_cooked(datetime.date.min)
         return len(self._entries)
 
     # --- Private
     def _balance(self, balance_attr, date=None, currency=None):
         entry = self.last_entry(date) if date else self.last_entry()
-        if entry:
+        if entry is not None:
             balance = getattr(entry, balance_attr)
             if currency:
                 return convert_amount(balance, currency, date)
@@ -189,12 +224,42 @@ class EntryList(Sequence):
         else:
             return 0
 
-    def _cash_flow(self, date_range, currency):
-        cache = self._date2entries
-        entries = flatten(cache[date] for date in date_range if date in cache)
-        entries = (e for e in entries if not getattr(e.transaction, 'is_budget', False))
-        amounts = (convert_amount(e.amount, currency, e.date) for e in entries)
-        return sum(amounts)
+    def _cumulative_cash_flow(self, currency):
+        cumulative = self._currency2cumulative_cashflow.setdefault(currency, [])
+        if len(cumulative) < len(self._sorted_entry_dates):
+            total = cumulative[-1] if cumulative else 0
+            for date in self._sorted_entry_dates[len(cumulative):]:
+                entries = self._date2entries[date]
+                entries = (e for e in entries if not getattr(e.transaction, 'is_budget', False))
+                total += sum(convert_amount(e.amount, currency, e.date) for e in entries)
+                cumulative.append(total)
+        return cumulative
+
+    def _clear_history(self):
+        self._cooked_from = datetime.date.min
+        self._history_entry = None
+        self._history_reconciled_balance = 0
+        self._cook_history = None
+
+    def _rescan_reconciled(self, index):
+        # Recomputes _last_reconciled, as well as our checkpoints, from entry `index` onwards.
+        checkpoint_index = index // RECONCILED_CHECKPOINT_INTERVAL
+        del self._reconciled_checkpoints[checkpoint_index+1:]
+        last_reconciled = self._reconciled_checkpoints[checkpoint_index]
+        for entry in self._entries[checkpoint_index*RECONCILED_CHECKPOINT_INTERVAL:]:
+            if entry.index % RECONCILED_CHECKPOINT_INTERVAL == 0 \
+                    and entry.index // RECONCILED_CHECKPOINT_INTERVAL == len(self._reconciled_checkpoints):
+                self._reconciled_checkpoints.append(last_reconciled)
+            if (last_reconciled is None) or (entry.reconciliation_key >= last_reconciled.reconciliation_key):
+                last_reconciled = entry
+        self._last_reconciled = last_reconciled
+
+    def _ensure_cooked(self, date):
+        if date < self._cooked_from:
+            self._cook_history(date)
+            if date < self._cooked_from:
+                # The oven doesn't manage our account anymore, there's nothing to cook.
+                self._clear_history()
 
     # --- Public
     def add_entry(self, entry):
@@ -203,14 +268,24 @@ class EntryList(Sequence):
         add_entry() calls must *always* be made in order (this is called pretty much only by the
         :class:`.Oven`).
         """
-        entry.index = len(self)
+        entry.index = len(self._entries)
+        if entry.index % RECONCILED_CHECKPOINT_INTERVAL == 0:
+            self._reconciled_checkpoints.append(self._last_reconciled)
         self._entries.append(entry)
         date = entry.date
         self._date2entries[date].append(entry)
         if not self._sorted_entry_dates or self._sorted_entry_dates[-1] < date:
             self._sorted_entry_dates.append(date)
+        else:
+            # The cumulative cash flow of our last date doesn't include this new entry anymore.
+            index = len(self._sorted_entry_dates) - 1
+            for cumulative in self._currency2cumulative_cashflow.values():
+                del cumulative[index:]
         if (self._last_reconciled is None) or (entry.reconciliation_key >= self._last_reconciled.reconciliation_key):
             self._last_reconciled = entry
+        rdate = entry.reconciliation_date
+        if rdate is not None and rdate > date:
+            self._late_reconciled.append(entry)
 
     def balance(self, date=None, currency=None):
         """Returns running balance for :attr:`account` at ``date``.
@@ -228,7 +303,7 @@ class EntryList(Sequence):
         if entry is not None:
             return entry.reconciled_balance
         else:
-            return 0
+            return self._history_reconciled_balance
 
     def balance_with_budget(self, date=None, currency=None):
         """Same as :meth:`balance`, but including :class:`.Budget` spawns."""
@@ -243,38 +318,71 @@ class EntryList(Sequence):
         :param currency: :class:`.Currency`
         """
         currency = currency or self.account.currency
-        cache_key = (date_range, currency)
-        if cache_key not in self._daterange2cashflow:
-            cash_flow = self._cash_flow(date_range, currency)
-            self._daterange2cashflow[cache_key] = cash_flow
-        return self._daterange2cashflow[cache_key]
+        self._ensure_cooked(date_range.start)
+        start_index = bisect.bisect_left(self._sorted_entry_dates, date_range.start)
+        end_index = bisect.bisect_right(self._sorted_entry_dates, date_range.end)
+        if start_index >= end_index:
+            return 0
+        cumulative = self._cumulative_cash_flow(currency)
+        if start_index > 0:
+            return cumulative[end_index - 1] - cumulative[start_index - 1]
+        else:
+            return cumulative[end_index - 1]
 
     def clear(self, from_date):
         """Remove all entries from ``from_date``."""
-        if from_date is None:
-            self._entries = []
-        else:
-            self._entries = list(takewhile(lambda e: e.date < from_date, self._entries))
-        if self._entries:
+        if from_date is None or from_date < self._cooked_from:
+            self._clear_history()
+        index = 0
+        if from_date is not None:
             index = bisect.bisect_left(self._sorted_entry_dates, from_date)
+        if index == len(self._sorted_entry_dates):
+            return # nothing to clear
+        if index:
+            # Our entries are in date order, so they're cut at the first entry of that date.
+            cut = self._date2entries[self._sorted_entry_dates[index]][0].index
             for date in self._sorted_entry_dates[index:]:
                 del self._date2entries[date]
-            for date_range, currency in list(self._daterange2cashflow.keys()):
-                if date_range.end >= from_date:
-                    del self._daterange2cashflow[(date_range, currency)]
+            for cumulative in self._currency2cumulative_cashflow.values():
+                del cumulative[index:]
             del self._sorted_entry_dates[index:]
-            self._last_reconciled = max(self._entries, key=lambda e: e.reconciliation_key)
+            del self._entries[cut:]
+            self._late_reconciled = [e for e in self._late_reconciled if e.index < cut]
+            self._rescan_reconciled(cut)
         else:
+            self._entries = []
             self._date2entries = defaultdict(list)
-            self._daterange2cashflow = {}
+            self._currency2cumulative_cashflow = {}
             self._sorted_entry_dates = []
+            self._reconciled_checkpoints = []
+            self._late_reconciled = []
             self._last_reconciled = None
 
+    def dates_in_range(self, date_range):
+        """Returns the sorted list of dates in ``date_range`` at which we have at least one entry.
+
+        :param date_range: :class:`.DateRange`
+        """
+        self._ensure_cooked(date_range.start)
+        start_index = bisect.bisect_left(self._sorted_entry_dates, date_range.start)
+        end_index = bisect.bisect_right(self._sorted_entry_dates, date_range.end)
+        return self._sorted_entry_dates[start_index:end_index]
+
+    def entries_in_range(self, date_range):
+        """Returns the list of entries occurring in ``date_range``, in order.
+
+        :param date_range: :class:`.DateRange`
+        """
+        dates = self.dates_in_range(date_range)
+        return [entry for date in dates for entry in self._date2entries[date]]
+
     def last_entry(self, date=None):
         """Return the last entry with a date that isn't after ``date``.
 
         If ``date`` isn't specified, returns the last entry in the list.
         """
+        if date is not None:
+            self._ensure_cooked(date)
         if self._entries:
             if date is None:
                 return self._entries[-1]
@@ -282,10 +390,70 @@ class EntryList(Sequence):
                 if date not in self._date2entries: # find the nearest smaller date
                     index = bisect.bisect_right(self._sorted_entry_dates, date) - 1
                     if index < 0:
-                        return None
+                        return self._history_entry
                     date = self._sorted_entry_dates[index]
                 return self._date2entries[date][-1]
-        return None
+        return self._history_entry
+
+    def set_history(self, cooked_from, last_entry, reconciled_balance, cook_history):
+        """Tells that entries before ``cooked_from`` aren't cooked.
+
+        Call this on an empty list, before adding entries from ``cooked_from``.
+
+        :param cooked_from: ``datetime.date`` of the first entry we'll have.
+        :param last_entry: :class:`Entry` that the oven would have added last before
+                           ``cooked_from``, ``None`` if there's none.
+        :param reconciled_balance: Balance of all reconciled entries before ``cooked_from``.
+        :param cook_history: Function that we call, with a date, when we need our entries to be
+                             cooked from that date. It must end up clearing us.
+        """
+        self._cooked_from = cooked_from
+        self._history_entry = last_entry
+        self._history_reconciled_balance = reconciled_balance
+        self._cook_history = cook_history
+
+    def toggle_reconciled(self, splits):
+        """Updates reconciled balances after ``splits`` have been reconciled or unreconciled.
+
+        The reconciliation date of ``splits`` must have been set to the date of their transaction,
+        or removed. Either way, their place in reconciliation order is the same, so we only have to
+        update the reconciled balance of entries coming after them in that order instead of having
+        the oven re-cook everything.
+
+        The entries of ``splits`` must have been cooked. :meth:`.Oven.toggle_reconciled` cooks
+        instead of calling us when they're in uncooked history.
+
+        :param splits: list of :class:`.Split` belonging to our :attr:`account`.
+        """
+        def order_key(entry):
+            return reconciliation_order_key(entry.split) + (entry.index, )
+
+        toggled = []
+        for split in splits:
+            entry = next(e for e in self._date2entries[split.transaction.date] if e.split is split)
+            delta = split.amount if split.reconciled else -split.amount
+            toggled.append((order_key(entry), entry, delta))
+        if not toggled:
+            return
+        toggled.sort(key=lambda t: t[0])
+        keys = [key for key, _, _ in toggled]
+        cumulative_deltas = []
+        total = 0
+        for _, _, delta in toggled:
+            total += delta
+            cumulative_deltas.append(total)
+        first_date = keys[0][1]
+        first_index = self._date2entries[first_date][0].index
+        candidates = [
+            e for e in self._late_reconciled
+            if e.date < first_date and e.reconciliation_date is not None and e.reconciliation_date > first_date
+        ]
+        candidates += self._entries[first_index:]
+        for entry in candidates:
+            count = bisect.bisect_right(keys, order_key(entry))
+            if count:
+                entry.reconciled_balance += cumulative_deltas[count-1]
+        self._rescan_reconciled(min(entry.index for _, entry, _ in toggled))
 
     def normal_balance(self, date=None, currency=None):
         """Returns a :meth:`normalized <.Account.normalize_amount>` :meth:`balance`."""
@@ -6,16 +6,40 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from bisect import bisect_left
 from collections import defaultdict
 from datetime import date
-from itertools import dropwhile
+from itertools import dropwhile, takewhile
 from operator import attrgetter
 
 from hscommon.util import flatten
 
-from .amount import convert_amount
-from .entry import Entry
-from .budget import BudgetSpawn
+from .amount import convert_amount, convert_amounts, of_currency
+from .entry import Entry, reconciliation_order_key
+from .budget import AccountTransactionIndex, BudgetSpawn
+from .recurrence import Spawn
+
+class HistoryCheckpoint:
+    """Balances of accounts at the start of a window cooked by :meth:`Oven.cook_window`.
+
+    Given to a later :meth:`Oven.cook_window` on the same data, it saves us from cooking the
+    history again. Because exchange rates can change between the two cooks, accounts which needed
+    currency conversions in their history aren't part of the checkpoint. They're cooked as usual.
+
+    :param from_date: ``datetime.date`` at which the history stops.
+    """
+    def __init__(self, from_date):
+        #: ``datetime.date`` at which the history stops.
+        self.from_date = from_date
+        #: ``{account: state}``. ``state`` is ``None`` if the account has no history. Otherwise,
+        #: it's ``(date, amount, balance, reconciled_balance, balance_with_budget,
+        #: history_reconciled_balance)``. The first 5 items are about the last entry before
+        #: :attr:`from_date` and the last one is the balance of all reconciled entries before it.
+        self.account2state = {}
+        #: Set of accounts which aren't in :attr:`account2state` because they needed currency
+        #: conversions.
+        self.converted_accounts = set()
+
 
 class Oven:
     """Computes raw data from transactions, schedules, budgets.
@@ -27,16 +51,27 @@ class Oven:
        app to display transactions and account entries.
     2. Creates :class:`.Entry` instances to place in :attr:`.Account.entries`. These entries contain
        running totals for each account (which is, of course, calculated).
+
+    With :meth:`cook_window`, it's possible to leave everything before a certain date uncooked.
+    That history is then cooked when it's needed, through :meth:`cook_history`.
     """
     def __init__(self, accounts, transactions, scheduled, budgets):
         self._accounts = accounts
         self._transactions = transactions
         self._scheduled = scheduled
         self._budgets = budgets
+        self._cooked_from = date.min
         self._cooked_until = date.min
         #: List of cooked transactions, containing :class:`.Transaction` instances mixed with
         #: schedule and budget :class:`.Spawn` instances (in date/position order).
         self.transactions = []
+        # For each reconciled split in self.transactions, in order, the date of its transaction and
+        # the highest reconciliation date so far. See _cook_from().
+        self._reconciled_txn_dates = []
+        self._reconciliation_max_dates = []
+        #: :class:`HistoryCheckpoint` of our last :meth:`cook_window`, ``None`` if there's none or
+        #: if the history has been re-cooked since.
+        self.checkpoint = None
 
     def _budget_spawns(self, until_date, schedule_spawns):
         if not self._budgets:
@@ -44,6 +79,8 @@ class Oven:
         result = []
         ref_date = min(b.start_date for b in self._budgets)
         relevant_txns = list(dropwhile(lambda t: t.date < ref_date, self._transactions)) + schedule_spawns
+        budgeted_accounts = {b.account for b in self._budgets}
+        txn_index = AccountTransactionIndex(relevant_txns, budgeted_accounts)
         # It's possible to have 2 budgets overlapping in date range and having the same account
         # When it happens, we need to keep track of which budget "consume" which txns
         account2consumedtxns = defaultdict(set)
@@ -51,22 +88,80 @@ class Oven:
             if not budget.amount:
                 continue
             consumedtxns = account2consumedtxns[budget.account]
-            spawns = budget.get_spawns(until_date, relevant_txns, consumedtxns)
+            spawns = budget.get_spawns(until_date, txn_index, consumedtxns)
             spawns = [spawn for spawn in spawns if not spawn.is_null]
             result += spawns
         return result
 
+    def _cook_from(self, from_date):
+        # Returns the date from which we have to cook, given that we have to cook from `from_date`.
+        # If a split from before `from_date` has a reconciliation date >= from_date, we have to cook
+        # from that split's date. That lowered date can have its own overlapping splits, and so on.
+        # The first split having a max reconciliation date >= from_date is the first split to be
+        # reconciled on or after from_date.
+        while True:
+            index = bisect_left(self._reconciliation_max_dates, from_date)
+            if index == len(self._reconciliation_max_dates):
+                return from_date
+            txn_date = self._reconciled_txn_dates[index]
+            if txn_date >= from_date:
+                return from_date
+            from_date = txn_date
+
+    def _cook_history_splits(self, account, splits):
+        # Returns the entry that _cook_splits() would have created last for `splits` as well as
+        # the reconciled balance of all of them.
+        dates = [split.transaction.date for split in splits]
+        converted_amounts = convert_amounts([split.amount for split in splits], account.currency, dates)
+        balance = 0
+        balance_with_budget = 0
+        for split, converted_amount in zip(splits, converted_amounts):
+            balance_with_budget += converted_amount
+            if not isinstance(split.transaction, BudgetSpawn):
+                balance += converted_amount
+        last_split = splits[-1]
+        last_key = reconciliation_order_key(last_split)
+        reconciled_balance = 0
+        last_reconciled_balance = 0
+        for split in splits:
+            if split.reconciled:
+                reconciled_balance += split.amount
+                if reconciliation_order_key(split) <= last_key:
+                    last_reconciled_balance += split.amount
+        entry = Entry(last_split, last_split.amount, balance, last_reconciled_balance, balance_with_budget)
+        return entry, reconciled_balance
+
+    def _checkpoint_history(self, checkpoint, history):
+        # Returns {account: (last_entry, reconciled_balance)} for the accounts in `checkpoint`, or
+        # None if `checkpoint` doesn't match `history`. We go backwards to find the last split of
+        # each account, which is also the split of its last entry.
+        result = {}
+        pending = {}
+        for account, state in checkpoint.account2state.items():
+            if state is None:
+                result[account] = (None, 0)
+            else:
+                pending[account] = state
+        for txn in reversed(history):
+            if not pending:
+                break
+            for split in reversed(txn.splits):
+                state = pending.pop(split.account, None)
+                if state is None:
+                    continue
+                date, amount, balance, reconciled_balance, balance_with_budget, history_reconciled_balance = state
+                if date != txn.date or amount != split.amount:
+                    return None
+                entry = Entry(split, amount, balance, reconciled_balance, balance_with_budget)
+                result[split.account] = (entry, history_reconciled_balance)
+        if pending:
+            return None
+        return result
+
     def _cook_reconciliation_balances(self, splits, start_balance):
         balance = start_balance
         result = {} # split: reconciliation balance
-
-        def recdate_key(s):
-            t = s.transaction
-            rdate = s.reconciliation_date
-            if rdate is None:
-                rdate = t.date
-            return (rdate, t.date, t.position)
-        by_recdate = sorted(splits, key=recdate_key)
+        by_recdate = sorted(splits, key=reconciliation_order_key)
         for split in by_recdate:
             if split.reconciled:
                 balance += split.amount
@@ -87,6 +182,42 @@ class Oven:
             reconciled_balance = split2reconciledbal[split]
             entries.add_entry(Entry(split, amount, balance, reconciled_balance, balance_with_budget))
 
+    def _index_reconciliations(self, transactions):
+        # Adds the reconciled splits of `transactions`, which come after all transactions we've
+        # indexed so far, to our reconciliation index.
+        txn_dates = self._reconciled_txn_dates
+        max_dates = self._reconciliation_max_dates
+        max_date = max_dates[-1] if max_dates else date.min
+        for txn in transactions:
+            for split in txn.splits:
+                rdate = split.reconciliation_date
+                if rdate is not None:
+                    max_date = max(max_date, rdate)
+                    txn_dates.append(txn.date)
+                    max_dates.append(max_date)
+
+    def _spawns(self, until_date):
+        spawns = flatten(recurrence.get_spawns(until_date) for recurrence in self._scheduled)
+        spawns += self._budget_spawns(until_date, spawns)
+        # To ensure that our sort order stay correct and consistent, we assign position values
+        # to our spawns. To ensure that there's no overlap, we start our position counter at
+        # len(transactions)
+        for counter, spawn in enumerate(spawns, start=len(self._transactions)):
+            spawn.position = counter
+        return spawns
+
+    def _splits_by_account(self, transactions, affected_accounts=None):
+        splits = flatten(t.splits for t in transactions)
+        account2splits = defaultdict(list)
+        for split in splits:
+            account = split.account
+            if account is None:
+                continue
+            if affected_accounts is not None and account not in affected_accounts:
+                continue
+            account2splits[account].append(split)
+        return account2splits
+
     def continue_cooking(self, until_date):
         """Cooks from where we stop last time until ``until_date``.
 
@@ -98,7 +229,7 @@ class Oven:
         if until_date > self._cooked_until:
             self.cook(self._cooked_until, until_date)
 
-    def cook(self, from_date=None, until_date=None):
+    def cook(self, from_date=None, until_date=None, affected_accounts=None):
         """Cooks raw data into :attr:`transactions`.
 
         :param from_date: when set, saves calculation time by re-using existing cooked transactions.
@@ -107,6 +238,12 @@ class Oven:
                            cooking. If we don't, we might end up in an infinite loop. If not set,
                            will be the date of the transaction with the highest date.
         :type until_date: ``datetime.date``
+        :param affected_accounts: when set, only the entries of these accounts are re-cooked. The
+                                  entries of all other accounts are left intact. The accounts
+                                  affected by spawns that changed since our last cook are
+                                  automatically added to the set. Ignored if ``until_date`` isn't
+                                  the same as in our last cook.
+        :type affected_accounts: set of :class:`.Account`
         """
         # Determine from/until dates
         if from_date is None:
@@ -114,43 +251,194 @@ class Oven:
         else:
             # it's possible that we have to reduce from_date a bit. If a split from before as a
             # reconciled date >= from_date, we have to set from_date to that split's normal date
-            # We reverse the transactions to correctly detect chained overlappings in date/recdate
-            splits = flatten(t.splits for t in reversed(self.transactions)) # splits from *cooked* txns
-            for split in splits:
-                rdate = split.reconciliation_date
-                if rdate is not None and rdate >= from_date:
-                    from_date = min(from_date, split.transaction.date)
+            from_date = self._cook_from(from_date)
+        if from_date < self._cooked_from:
+            # We're asked to re-cook history that we never cooked. Cook everything.
+            from_date = date.min
+            affected_accounts = None
+        if self.checkpoint is not None and from_date < self.checkpoint.from_date:
+            self.checkpoint = None
         self._transactions.sort(key=attrgetter('date', 'position')) # needed in case until_date is None
         if until_date is None:
             until_date = self._transactions[-1].date if self._transactions else from_date
+        if until_date != self._cooked_until:
+            # Untouched accounts would miss spawns (or keep stale ones), we have to cook everything.
+            affected_accounts = None
+        if affected_accounts is not None:
+            affected_accounts = set(affected_accounts)
+            old_spawns = {t for t in self.transactions if t.date >= from_date and isinstance(t, Spawn)}
         # Clear old cooked data
-        for account in self._accounts:
-            account.entries.clear(from_date)
         if from_date == date.min:
             self.transactions = []
         else:
             self.transactions = [t for t in self.transactions if t.date < from_date]
+        index = bisect_left(self._reconciled_txn_dates, from_date)
+        del self._reconciled_txn_dates[index:]
+        del self._reconciliation_max_dates[index:]
         # Cook
-        spawns = flatten(recurrence.get_spawns(until_date) for recurrence in self._scheduled)
-        spawns += self._budget_spawns(until_date, spawns)
-        # To ensure that our sort order stay correct and consistent, we assign position values
-        # to our spawns. To ensure that there's no overlap, we start our position counter at
-        # len(transactions)
-        for counter, spawn in enumerate(spawns, start=len(self._transactions)):
-            spawn.position = counter
+        spawns = self._spawns(until_date)
+        if affected_accounts is not None:
+            # Spawn caches are reset by many schedule operations. When it happens, new spawn
+            # instances replace old ones and accounts referencing the old ones have to be re-cooked.
+            new_spawns = {spawn for spawn in spawns if spawn.date >= from_date}
+            for spawn in old_spawns ^ new_spawns:
+                affected_accounts |= spawn.affected_accounts()
+            # Budget spawns amounts depend on the transactions of the budget's account and they
+            # affect the budget's target.
+            for budget in self._budgets:
+                if budget.account in affected_accounts and budget.target is not None:
+                    affected_accounts.add(budget.target)
+            toclear = [a for a in self._accounts if a in affected_accounts]
+        else:
+            toclear = self._accounts
+        for account in toclear:
+            account.entries.clear(from_date)
         txns = self._transactions + spawns
         # we don't filter out txns > until_date because they might be budgets affecting current data
         # XXX now that budget's base date is the start date, isn't this untrue?
         tocook = [t for t in txns if from_date <= t.date]
         tocook.sort(key=attrgetter('date'))
-        splits = flatten(t.splits for t in tocook)
-        account2splits = defaultdict(list)
-        for split in splits:
-            account = split.account
-            if account is not None:
-                account2splits[account].append(split)
+        account2splits = self._splits_by_account(tocook, affected_accounts)
         for account, splits in account2splits.items():
             self._cook_splits(account, splits)
         self.transactions += tocook
+        self._index_reconciliations(tocook)
         self._cooked_until = until_date
+        if from_date == date.min:
+            self._cooked_from = date.min
+
+    def cook_history(self, from_date):
+        """Makes sure that everything from ``from_date`` is cooked.
+
+        If :meth:`cook_window` left history before ``from_date`` uncooked, we cook everything.
+        """
+        if from_date < self._cooked_from:
+            # History is the same as before, so our checkpoint is still good.
+            checkpoint = self.checkpoint
+            self.cook(until_date=self._cooked_until)
+            self.checkpoint = checkpoint
+
+    def cook_window(self, from_date, until_date=None, checkpoint=None):
+        """Cooks raw data into :attr:`transactions`, but only from ``from_date``.
+
+        Transactions before ``from_date`` don't end up in :attr:`transactions` and don't get
+        entries. For each account, we only compute the entry that would be the last one before
+        ``from_date`` so that balances are correct from there on (see
+        :meth:`.EntryList.set_history`). On documents with a long history, this is much faster than
+        a full :meth:`cook`.
+
+        ``from_date`` might be lowered a bit because splits reconciled at or after it have to be
+        cooked with it.
+
+        Once cooked, :attr:`checkpoint` holds balances at the start of the window. They can be
+        given back to us, through ``checkpoint``, the next time we cook a window on the same data.
+        If the checkpoint starts before (or at) ``from_date``, we cook from there without having to
+        go through the history. Otherwise, or if it doesn't match our data, it's ignored.
 
+        :param from_date: ``datetime.date`` from which we cook.
+        :param until_date: same as in :meth:`cook`.
+        :param checkpoint: :class:`HistoryCheckpoint` of a previous cook of the same data.
+        """
+        self._transactions.sort(key=attrgetter('date', 'position'))
+        if until_date is None:
+            until_date = self._transactions[-1].date if self._transactions else from_date
+        spawns = self._spawns(until_date)
+        txns = self._transactions + spawns
+        txns.sort(key=attrgetter('date'))
+        account2history = None
+        # Budget spawns happen after today. History before today doesn't depend on them.
+        if checkpoint is not None and checkpoint.from_date <= min(from_date, date.today()):
+            history = list(takewhile(lambda t: t.date < checkpoint.from_date, txns))
+            account2history = self._checkpoint_history(checkpoint, history)
+            if account2history is not None:
+                from_date = checkpoint.from_date
+        if account2history is None:
+            account2history = {}
+            # Same as in cook(): we go backwards to correctly detect chained overlappings.
+            for txn in reversed(txns):
+                if txn.date >= from_date:
+                    continue
+                for split in txn.splits:
+                    rdate = split.reconciliation_date
+                    if rdate is not None and rdate >= from_date:
+                        from_date = txn.date
+                        break
+            history = list(takewhile(lambda t: t.date < from_date, txns))
+        if not history:
+            from_date = date.min
+        tocook = txns[len(history):]
+        cacheable = set(account2history)
+        uncooked = [a for a in self._accounts if a not in account2history]
+        if from_date > date.min and uncooked:
+            account2splits = self._splits_by_account(history, affected_accounts=set(uncooked))
+            for account in uncooked:
+                splits = account2splits.get(account)
+                if splits:
+                    account2history[account] = self._cook_history_splits(account, splits)
+                    if all(of_currency(split.amount, account.currency) for split in splits):
+                        cacheable.add(account)
+                else:
+                    account2history[account] = (None, 0)
+                    cacheable.add(account)
+        for account in self._accounts:
+            account.entries.clear(None)
+            if from_date > date.min:
+                last_entry, reconciled_balance = account2history[account]
+                account.entries.set_history(from_date, last_entry, reconciled_balance, self.cook_history)
+        if date.min < from_date <= date.today():
+            self.checkpoint = HistoryCheckpoint(from_date)
+            for account in cacheable:
+                last_entry, reconciled_balance = account2history[account]
+                if last_entry is None:
+                    state = None
+                else:
+                    state = (
+                        last_entry.date, last_entry.amount, last_entry.balance,
+                        last_entry.reconciled_balance, last_entry.balance_with_budget,
+                        reconciled_balance,
+                    )
+                self.checkpoint.account2state[account] = state
+            self.checkpoint.converted_accounts = set(self._accounts) - cacheable
+        else:
+            self.checkpoint = None
+        account2splits = self._splits_by_account(tocook)
+        for account, splits in account2splits.items():
+            self._cook_splits(account, splits)
+        self.transactions = tocook
+        self._reconciled_txn_dates = []
+        self._reconciliation_max_dates = []
+        self._index_reconciliations(tocook)
+        self._cooked_from = from_date
+        self._cooked_until = until_date
+
+    def toggle_reconciled(self, splits):
+        """Updates account entries after ``splits`` have been reconciled or unreconciled.
+
+        When the reconciliation date of splits is set to the date of their transaction, or removed,
+        only reconciled balances change, which is much faster to update than to :meth:`cook`. See
+        :meth:`.EntryList.toggle_reconciled`.
+
+        Our reconciliation index doesn't have to change: newly reconciled splits are reconciled at
+        their own date and never make us cook from an earlier date. Unreconciled splits staying in
+        the index can only make us cook from an earlier date than necessary.
+
+        Reconciled balances in our :attr:`checkpoint` don't hold anymore if one of the splits is
+        before it, so we drop it. If one of the splits is in history we haven't cooked yet, it has
+        no entry to update and we :meth:`cook` instead.
+
+        :param splits: list of :class:`.Split`
+        """
+        splits = [split for split in splits if split.account is not None]
+        if not splits:
+            return
+        min_date = min(split.transaction.date for split in splits)
+        if self.checkpoint is not None and min_date < self.checkpoint.from_date:
+            self.checkpoint = None
+        if min_date < self._cooked_from:
+            self.cook(from_date=min_date, until_date=self._cooked_until)
+            return
+        account2splits = defaultdict(list)
+        for split in splits:
+            account2splits[split.account].append(split)
+        for account, account_splits in account2splits.items():
+            account.entries.toggle_reconciled(account_splits)
@@ -8,6 +8,7 @@
 
 import copy
 import datetime
+from bisect import bisect_right
 from calendar import monthrange
 from itertools import chain
 
@@ -45,6 +46,19 @@ RTYPE2INCFUNC = {
     RepeatType.WeekdayLast: inc_last_weekday_in_month,
 }
 
+# Length of an increment for each repeat type, in days or in months. This allows us to compute
+# where a date falls in a DateCounter without iterating.
+RTYPE2DAYS = {
+    RepeatType.Daily: 1,
+    RepeatType.Weekly: 7,
+}
+RTYPE2MONTHS = {
+    RepeatType.Monthly: 1,
+    RepeatType.Yearly: 12,
+    RepeatType.Weekday: 1,
+    RepeatType.WeekdayLast: 1,
+}
+
 ONE_DAY = datetime.timedelta(1)
 
 class DateCounter:
@@ -58,6 +72,10 @@ class DateCounter:
     it and return the first month to have it. So, sometimes, we can have big gap in between our
     dates.
 
+    Dates can also be accessed directly by their index (the number of increments since
+    ``base_date``) with :meth:`date_at` and :meth:`index_from`. Iteration can then be resumed from
+    any date with :meth:`skip_to`.
+
     :param base_date: Date from which we start our iteration. For weekly repeat types, this date
                       also determines which weekday we're looking for in our next dates. If our base
                       date is the 2nd friday of its month, then we're going to iterate over all 2nd
@@ -76,6 +94,7 @@ class DateCounter:
         self.base_date = base_date
         self.end = end
         self.inccount = 0
+        self.repeat_type = repeat_type
         self.incfunc = RTYPE2INCFUNC[repeat_type]
         self.incsize = repeat_every
         self.current_date = None
@@ -100,6 +119,44 @@ class DateCounter:
         self.current_date = new_date
         return new_date
 
+    def date_at(self, index):
+        """Returns the date ``index`` increments after ``base_date``.
+
+        ``end`` is ignored. If that increment is one of the beats we skip, returns ``None``.
+        """
+        if index == 0:
+            return self.base_date
+        return self.incfunc(self.base_date, index * self.incsize)
+
+    def index_from(self, target):
+        """Returns the index of the first date on or after ``target``.
+
+        ``end`` is ignored. See :meth:`date_at`.
+        """
+        base_date = self.base_date
+        if target <= base_date:
+            return 0
+        if self.repeat_type in RTYPE2DAYS:
+            # Days are regular, our division is exact.
+            days = RTYPE2DAYS[self.repeat_type] * self.incsize
+            return -(-(target - base_date).days // days)
+        # Our estimate is the last index in a month before or equal to target's month. Months have
+        # different lengths and we might have to skip beats, so we move forward from there.
+        months = RTYPE2MONTHS[self.repeat_type] * self.incsize
+        index = ((target.year - base_date.year) * 12 + target.month - base_date.month) // months
+        while True:
+            new_date = self.date_at(index)
+            if new_date is not None and new_date >= target:
+                return index
+            index += 1
+
+    def skip_to(self, target):
+        """Makes our next iteration yield the first date on or after ``target``."""
+        index = self.index_from(target)
+        if index > 0:
+            self.inccount = (index - 1) * self.incsize
+            self.current_date = self.base_date
+
 
 class Spawn(Transaction):
     """Instance of a recurrent transaction at a specific date.
@@ -135,6 +192,33 @@ class Spawn(Transaction):
         self.balance()
 
 
+class SpawnHorizon:
+    """Where :meth:`Recurrence.get_spawns` stopped spawning last time.
+
+    Spawning always starts at :attr:`Recurrence.start_date`, but for a recurrence that started a
+    long time ago, going through all its dates at each cook is expensive. We keep the spawns we've
+    generated so far along with the state of the iteration so that we can continue from there.
+
+    A horizon is only valid as long as the recurrence's start date, repeat settings and exceptions
+    don't change. When they do, the recurrence starts over with a new horizon.
+    """
+    def __init__(self):
+        #: :class:`DateCounter` for our recurrence, ``None`` until we start spawning.
+        self.date_counter = None
+        #: Next date to be yielded by :attr:`date_counter`. ``None`` if it's exhausted.
+        self.next_date = None
+        #: Date from which we spawn. See :meth:`Recurrence._spawn_start`.
+        self.start_date = None
+        #: Recurrence dates of :attr:`spawns`.
+        self.dates = []
+        #: Spawns (and exceptions) generated so far, in order.
+        self.spawns = []
+        #: Template transaction in effect at :attr:`next_date`.
+        self.ref = None
+        #: ``datetime.timedelta`` of the global change in effect at :attr:`next_date`.
+        self.date_delta = datetime.timedelta(days=0)
+
+
 class Recurrence:
     """A recurring transaction (called "Schedule" in the app).
 
@@ -188,6 +272,9 @@ class Recurrence:
         self.date2globalchange = {}
         #: ``recurrent_date -> transaction`` mapping of spawns. Used as a cache. Frequently purged.
         self.date2instances = {}
+        #: :class:`SpawnHorizon`. Where we stopped spawning. Purged along with
+        #: :attr:`date2instances`.
+        self.spawn_horizon = SpawnHorizon()
         self.rtype2desc = {
             RepeatType.Daily: tr('Daily'),
             RepeatType.Weekly: tr('Weekly'),
@@ -209,6 +296,11 @@ class Recurrence:
     def _create_spawn(self, ref, date):
         return Spawn(self, ref, date)
 
+    def _spawn_start(self):
+        # Returns the date at which get_spawns() can start spawning. Subclasses that don't need all
+        # spawns can skip some of them. Skipping is only possible when there's no exception.
+        return self.start_date
+
     def _update_ref(self):
         # Go through our recurrence dates and see if we should either move our start date due to
         # deleted spawns or to update or ref transaction due to a global change that end up being
@@ -307,28 +399,41 @@ class Recurrence:
                 end += -min_date_delta
         end = min(end, nonone(self.stop_date, datetime.date.max))
 
-        date_counter = DateCounter(self.start_date, self.repeat_type, self.repeat_every, end)
-        result = []
-        global_date_delta = datetime.timedelta(days=0)
-        current_ref = self.ref
-        for current_date in date_counter:
+        spawn_start = self._spawn_start()
+        horizon = self.spawn_horizon
+        if horizon.date_counter is not None and spawn_start < horizon.start_date:
+            horizon = self.spawn_horizon = SpawnHorizon()
+        if horizon.date_counter is None:
+            horizon.date_counter = DateCounter(
+                self.start_date, self.repeat_type, self.repeat_every, datetime.date.max
+            )
+            if spawn_start > self.start_date:
+                horizon.date_counter.skip_to(spawn_start)
+            horizon.start_date = spawn_start
+            horizon.next_date = next(horizon.date_counter, None)
+            horizon.ref = self.ref
+        while horizon.next_date is not None and horizon.next_date <= end:
+            current_date = horizon.next_date
             if current_date in self.date2globalchange:
-                current_ref = self.date2globalchange[current_date]
-                global_date_delta = current_ref.date - current_date
+                horizon.ref = self.date2globalchange[current_date]
+                horizon.date_delta = horizon.ref.date - current_date
             if current_date in self.date2exception:
                 exception = self.date2exception[current_date]
                 if exception is not None:
-                    result.append(exception)
+                    horizon.dates.append(current_date)
+                    horizon.spawns.append(exception)
             else:
                 if current_date not in self.date2instances:
-                    spawn = self._create_spawn(current_ref, current_date)
-                    if global_date_delta:
+                    spawn = self._create_spawn(horizon.ref, current_date)
+                    if horizon.date_delta:
                         # Only muck with spawn.date if we have a delta. otherwise we're breaking
                         # budgets.
-                        spawn.date = current_date + global_date_delta
+                        spawn.date = current_date + horizon.date_delta
                     self.date2instances[current_date] = spawn
-                result.append(self.date2instances[current_date])
-        return result
+                horizon.dates.append(current_date)
+                horizon.spawns.append(self.date2instances[current_date])
+            horizon.next_date = next(horizon.date_counter, None)
+        return horizon.spawns[:bisect_right(horizon.dates, end)]
 
     def reassign_account(self, account, reassign_to=None):
         """Reassigns accounts for :attr:`ref` and all exceptions.
@@ -348,16 +453,19 @@ class Recurrence:
         result.date2globalchange = copy.copy(self.date2globalchange)
         result.date2instances = {}
         result.ref = self.ref.replicate()
+        result.spawn_horizon = SpawnHorizon()
         return result
 
     def reset_exceptions(self):
         """Empties :attr:`date2exception` and :attr:`date2globalchange`."""
         self.date2exception = {}
         self.date2globalchange = {}
+        self.spawn_horizon = SpawnHorizon()
 
     def reset_spawn_cache(self):
-        """Empties :attr:`date2instances`."""
+        """Empties :attr:`date2instances` and :attr:`spawn_horizon`."""
         self.date2instances = {}
+        self.spawn_horizon = SpawnHorizon()
 
     def stop_at(self, spawn):
         """Stop further spawning at ``spawn`` (sets :attr:`stop_date`)."""
@@ -30,6 +30,10 @@ class Transaction:
     we initialize what would otherwise be an empty split list with two splits: One adding ``amount``
     to ``account``, and the other adding ``-amount`` to ``None`` (an unassigned split).
     """
+    # Documents can have a lot of transactions. We save a lot of memory by not having a __dict__.
+    # Subclasses such as Spawn can still have one.
+    __slots__ = ['date', 'description', 'payee', 'checkno', 'notes', 'splits', 'position', 'mtime']
+
     def __init__(self, date, description=None, payee=None, checkno=None, account=None, amount=None):
         #: Date at which the transation occurs.
         self.date = date
@@ -213,7 +217,7 @@ class Transaction:
 
     def change(
             self, date=NOEDIT, description=NOEDIT, payee=NOEDIT, checkno=NOEDIT, from_=NOEDIT,
-            to=NOEDIT, amount=NOEDIT, currency=NOEDIT, notes=NOEDIT):
+            to=NOEDIT, amount=NOEDIT, currency=NOEDIT, notes=NOEDIT, string_pool=None):
         """Changes our transaction and do all proper stuff.
 
         Sets all specified arguments to their specified values and do proper adjustments, such as
@@ -236,6 +240,8 @@ class Transaction:
         :param amount: :class:`.Amount`
         :param currency: :class:`.Currency`
         :param notes: ``str``
+        :param string_pool: If set, ``description`` and ``payee`` are interned in it.
+        :type string_pool: :class:`StringPool`
         """
         # from_ and to are Account instances
         if date is not NOEDIT:
@@ -249,8 +255,12 @@ class Transaction:
                     split.reconciliation_date = None
             self.date = date
         if description is not NOEDIT:
+            if string_pool is not None:
+                description = string_pool.intern(description)
             self.description = description
         if payee is not NOEDIT:
+            if string_pool is not None:
+                payee = string_pool.intern(payee)
             self.payee = payee
         if checkno is not NOEDIT:
             self.checkno = checkno
@@ -296,7 +306,8 @@ class Transaction:
         * group
 
         All of these queries are string-based, except ``amount``, which requires an
-        :class:`.Amount`.
+        :class:`.Amount`, or a ``(low, high)`` tuple of amounts for an inclusive range. Amount
+        queries are compared to the absolute value of split amounts.
 
         Returns true if any criteria matches, false otherwise.
         """
@@ -319,10 +330,13 @@ class Transaction:
                     return True
         query_amount = query.get('amount')
         if query_amount is not None:
-            query_value = query_amount.value if query_amount else 0
+            if isinstance(query_amount, tuple):
+                low, high = (amount.value if amount else 0 for amount in query_amount)
+            else:
+                low = high = query_amount.value if query_amount else 0
             for split in self.splits:
-                split_value = split.amount.value if split.amount else 0
-                if query_value == abs(split_value):
+                split_value = abs(split.amount.value) if split.amount else 0
+                if low <= split_value <= high:
                     return True
         query_account = query.get('account')
         if query_account is not None:
@@ -374,7 +388,18 @@ class Transaction:
         """Returns a copy of self using :meth:`from_transaction`."""
         return Transaction.from_transaction(self)
 
-    def set_splits(self, splits, preserve_instances=False):
+    def intern_strings(self, string_pool):
+        """Makes our description, payee and split memos go through ``string_pool``.
+
+        :param string_pool: :class:`StringPool`
+        """
+        intern = string_pool.intern
+        self.description = intern(self.description)
+        self.payee = intern(self.payee)
+        for split in self.splits:
+            split.memo = intern(split.memo)
+
+    def set_splits(self, splits, preserve_instances=False, string_pool=None):
         """Sets :attr:`splits` to copies of splits in ``splits``.
 
         :param bool preserve_instances: Try to "recycle" split instances as much as possible. This
@@ -382,12 +407,14 @@ class Transaction:
             mechanism and entry identity is based on split instances, so it breaks if we don't keep
             instances there. However, we don't want to preserve instances in all cases. For example,
             when spawning transactions from recurrences, we want fresh instances.
+        :param string_pool: If set, split memos are interned in it.
+        :type string_pool: :class:`StringPool`
         """
         if preserve_instances:
             if len(splits) < len(self.splits):
                 del self.splits[len(splits):]
             for split, newsplit in zip(self.splits, splits):
-                split.__dict__.update(newsplit.__dict__)
+                split.copy_from(newsplit)
                 split.transaction = self
             for split in splits[len(self.splits):]:
                 split.transaction = self
@@ -398,6 +425,9 @@ class Transaction:
                 newsplit = copy(split)
                 newsplit.transaction = self
                 self.splits.append(newsplit)
+        if string_pool is not None:
+            for split in self.splits:
+                split.memo = string_pool.intern(split.memo)
 
     def splitted_splits(self):
         """Returns :attr:`splits` separated in two groups ("froms" and "tos").
@@ -478,8 +508,25 @@ class Transaction:
         return all(not s.amount for s in self.splits)
 
 
+class StringPool(dict):
+    """Pool of the strings used by the transactions of a document.
+
+    Payees, descriptions and memos repeat a lot. When they go through the pool, transactions share a
+    single instance of each distinct string, which saves memory and makes comparing them faster
+    (equal strings are then also identical).
+
+    This subclasses ``dict``, each string being mapped to itself.
+    """
+    def intern(self, s):
+        """Returns the pooled instance of ``s``, pooling ``s`` if it's new."""
+        return self.setdefault(s, s)
+
+
 class Split:
     """Assignment of money to an :class:`.Account` within a :class:`Transaction`."""
+    # We have even more splits than transactions, see Transaction.__slots__
+    __slots__ = ['transaction', '_account', 'memo', '_amount', 'reconciliation_date', 'reference']
+
     def __init__(self, transaction, account, amount):
         #: Transaction within which our split lives.
         self.transaction = transaction
@@ -495,7 +542,17 @@ class Split:
     def __repr__(self):
         return '<Split %r %s>' % (self.account_name, self.amount)
 
+    def __copy__(self):
+        result = Split.__new__(Split)
+        result.copy_from(self)
+        return result
+
     # --- Public
+    def copy_from(self, other):
+        """Sets all our attributes, :attr:`transaction` included, to those of ``other``."""
+        for attr in Split.__slots__:
+            setattr(self, attr, getattr(other, attr))
+
     def is_on_same_side(self, other_split):
         return (self.amount >= 0) == (other_split.amount >= 0)
 
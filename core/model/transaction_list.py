@@ -4,8 +4,105 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from collections import defaultdict
 from operator import itemgetter
 
+def search_keys(transaction):
+    """Returns the values under which ``transaction`` is indexed for searching.
+
+    The result is a tuple of values collections, in the order description, payee, checkno, memos,
+    accounts and amounts. Strings are lowercased and amounts are absolute values, like in
+    :meth:`.Transaction.matches`.
+    """
+    return (
+        (transaction.description.lower(), ),
+        (transaction.payee.lower(), ),
+        (transaction.checkno.lower(), ),
+        {split.memo.lower() for split in transaction.splits},
+        {split.account for split in transaction.splits if split.account is not None},
+        {abs(split.amount.value) if split.amount else 0 for split in transaction.splits},
+    )
+
+def trigrams(word):
+    """Returns the set of 3 characters substrings of ``word``."""
+    return {word[i:i+3] for i in range(len(word) - 2)}
+
+class SubstringIndex:
+    """Finds, among strings we've been given, those containing a substring.
+
+    Strings are split in words (on whitespace) and we keep a ``trigram -> words`` index of these
+    words. A substring's whitespace-free parts are always within a word of the strings containing
+    it, so the trigrams of its longest part lead us to a few candidate words, and from there to a
+    few candidate strings. Candidates are then checked with ``in``, so results are exactly the
+    same as if we had checked every string.
+
+    Strings are counted: a string added twice has to be removed twice to be forgotten.
+    """
+    def __init__(self):
+        self._string2count = {}
+        self._word2strings = defaultdict(set)
+        self._trigram2words = defaultdict(set)
+
+    def _candidate_words(self, part):
+        # Words containing `part`, which has no whitespace.
+        if len(part) < 3:
+            return [word for word in self._word2strings if part in word]
+        found = []
+        for trigram in trigrams(part):
+            words = self._trigram2words.get(trigram)
+            if not words:
+                return []
+            found.append(words)
+        found.sort(key=len)
+        words = set(found[0])
+        for other in found[1:]:
+            words &= other
+        return [word for word in words if part in word]
+
+    def add(self, string):
+        """Adds ``string`` to the index."""
+        count = self._string2count.get(string, 0)
+        self._string2count[string] = count + 1
+        if count:
+            return
+        for word in set(string.split()):
+            strings = self._word2strings[word]
+            if not strings:
+                for trigram in trigrams(word):
+                    self._trigram2words[trigram].add(word)
+            strings.add(string)
+
+    def remove(self, string):
+        """Removes ``string`` from the index."""
+        count = self._string2count[string] - 1
+        if count:
+            self._string2count[string] = count
+            return
+        del self._string2count[string]
+        for word in set(string.split()):
+            strings = self._word2strings[word]
+            strings.discard(string)
+            if not strings:
+                del self._word2strings[word]
+                for trigram in trigrams(word):
+                    words = self._trigram2words[trigram]
+                    words.discard(word)
+                    if not words:
+                        del self._trigram2words[trigram]
+
+    def containing(self, substring):
+        """Returns the set of our strings containing ``substring``."""
+        parts = substring.split()
+        if not parts:
+            # Empty or whitespace-only, there are no words to look at.
+            return {string for string in self._string2count if substring in string}
+        part = max(parts, key=len)
+        candidates = set()
+        for word in self._candidate_words(part):
+            candidates |= self._word2strings[word]
+        return {string for string in candidates if substring in string}
+
+
 class TransactionList(list):
     """Manages the :class:`.Transaction` instances of a document.
 
@@ -13,6 +110,18 @@ class TransactionList(list):
     a cache of values to use for completion. There's only one of those in a document, in
     :attr:`.Document.transactions`.
 
+    To avoid scanning the whole list whenever we need transactions at a specific date, we keep a
+    ``date -> transactions`` index. That index is built lazily and then maintained by our mutating
+    methods. When the date of a transaction in the list is changed, the index has to be told about
+    it through :meth:`reindex_transaction`.
+
+    We also keep a search index, used by :meth:`matcher`. For each transaction, we keep its
+    :func:`search_keys` and we index distinct descriptions, payees and memos in a
+    :class:`SubstringIndex` each. A text search then only looks at the few words containing what
+    we're looking for instead of going through every transaction. Like the date index, it's built
+    lazily. When a transaction is changed in a searchable way, :meth:`reindex_transaction` has to
+    be called.
+
     Subclasses ``list``.
     """
     def __init__(self, *args, **kwargs):
@@ -20,11 +129,28 @@ class TransactionList(list):
         self._descriptions = None
         self._payees = None
         self._account_names = None
+        self._date2transactions = None
+        # transaction -> search_keys(transaction). None when our search index isn't built.
+        self._transaction2search_keys = None
+        # SubstringIndex for descriptions, payees and memos.
+        self._substring_indexes = None
 
     # --- Overrides
     def remove(self, transaction):
         """Removes ``transaction`` from the list."""
         list.remove(self, transaction)
+        index = self._date2transactions
+        if index is not None:
+            transactions = index.get(transaction.date)
+            if transactions is not None and transaction in transactions:
+                transactions.remove(transaction)
+                if not transactions:
+                    del index[transaction.date]
+            else:
+                # The date of our transaction changed without us knowing, our index is stale.
+                self._date2transactions = None
+        if self._transaction2search_keys is not None:
+            self._unindex_for_search(transaction)
         self.clear_cache()
 
     # --- Private
@@ -58,6 +184,39 @@ class TransactionList(list):
         data_and_mtime = ((t.payee, t.mtime) for t in self)
         self._payees = self._compute_completion_list(data_and_mtime)
 
+    def _date_index(self):
+        if self._date2transactions is None:
+            index = defaultdict(list)
+            for transaction in self:
+                index[transaction.date].append(transaction)
+            self._date2transactions = index
+        return self._date2transactions
+
+    def _index_for_search(self, transaction):
+        keys = search_keys(transaction)
+        self._transaction2search_keys[transaction] = keys
+        description, payee, _, memos, _, _ = keys
+        for substring_index, values in zip(self._substring_indexes, (description, payee, memos)):
+            for value in values:
+                substring_index.add(value)
+
+    def _search_index(self):
+        if self._transaction2search_keys is None:
+            self._transaction2search_keys = {}
+            self._substring_indexes = (SubstringIndex(), SubstringIndex(), SubstringIndex())
+            for transaction in self:
+                self._index_for_search(transaction)
+        return self._transaction2search_keys
+
+    def _unindex_for_search(self, transaction):
+        keys = self._transaction2search_keys.pop(transaction, None)
+        if keys is None:
+            return
+        description, payee, _, memos, _, _ = keys
+        for substring_index, values in zip(self._substring_indexes, (description, payee, memos)):
+            for value in values:
+                substring_index.remove(value)
+
     # --- Public
     def add(self, transaction, keep_position=False, position=None):
         """Adds ``transaction`` to self
@@ -68,15 +227,23 @@ class TransactionList(list):
         if position is not None:
             transaction.position = position
         elif not keep_position:
-            transactions = self.transactions_at_date(transaction.date)
+            transactions = self._date_index().get(transaction.date)
             if transactions:
                 transaction.position = max(t.position for t in transactions) + 1
         self.append(transaction)
+        # When positions are given, we're probably loading a file. No need to build our index yet.
+        if self._date2transactions is not None:
+            self._date2transactions[transaction.date].append(transaction)
+        if self._transaction2search_keys is not None:
+            self._index_for_search(transaction)
         self.clear_cache()
 
     def clear(self):
         """Clears the list of all transactions."""
         del self[:]
+        self._date2transactions = None
+        self._transaction2search_keys = None
+        self._substring_indexes = None
         self.clear_cache()
 
     def clear_cache(self):
@@ -99,19 +266,78 @@ class TransactionList(list):
             transaction.reassign_account(account, reassign_to)
             if not transaction.affected_accounts():
                 self.remove(transaction)
+            else:
+                self.reindex_transaction(transaction)
         self.clear_cache()
 
+    def matcher(self, query):
+        """Returns a function telling whether a transaction matches ``query``.
+
+        ``query`` is a ``dict`` as described in :meth:`.Transaction.matches` and the returned
+        function gives the same answers as that method. Text criteria are looked up once, through
+        our search index, and the function then only has to compare a transaction's
+        :func:`search_keys` with what was found. Transactions that aren't in the list, such as
+        schedule spawns, are matched with :meth:`.Transaction.matches`.
+        """
+        indexed = self._search_index()
+        text_matches = []
+        for substring_index, key in zip(self._substring_indexes, ('description', 'payee', 'memo')):
+            query_value = query.get(key)
+            text_matches.append(None if query_value is None else substring_index.containing(query_value))
+        description_matches, payee_matches, memo_matches = text_matches
+        query_checkno = query.get('checkno')
+        query_amount = query.get('amount')
+        if query_amount is not None:
+            if isinstance(query_amount, tuple):
+                low, high = (amount.value if amount else 0 for amount in query_amount)
+            else:
+                low = high = query_amount.value if query_amount else 0
+        query_account = query.get('account')
+        query_group = query.get('group')
+        account2matching = {}
+
+        def account_matches(account):
+            # Names are looked at now, so renaming an account or a group doesn't require reindexing.
+            result = account2matching.get(account)
+            if result is None:
+                result = query_account is not None and account.name.lower() in query_account
+                if not result and query_group is not None and account.group is not None:
+                    result = account.group.name.lower() in query_group
+                account2matching[account] = result
+            return result
+
+        def is_matching(transaction):
+            keys = indexed.get(transaction)
+            if keys is None:
+                return transaction.matches(query)
+            descriptions, payees, checknos, memos, accounts, amounts = keys
+            if description_matches is not None and not description_matches.isdisjoint(descriptions):
+                return True
+            if payee_matches is not None and not payee_matches.isdisjoint(payees):
+                return True
+            if query_checkno is not None and query_checkno in checknos:
+                return True
+            if memo_matches is not None and not memo_matches.isdisjoint(memos):
+                return True
+            if query_amount is not None and any(low <= value <= high for value in amounts):
+                return True
+            if query_account is not None or query_group is not None:
+                return any(account_matches(account) for account in accounts)
+            return False
+
+        return is_matching
+
     def move_before(self, from_transaction, to_transaction):
         """Moves ``from_transaction`` just before ``to_transaction``.
 
         If ``to_transaction`` is ``None``, ``from_transaction`` is moved to the end of the
         list. You must :ref:`recook <cooking>` after having done a move (or a bunch of moves)
         """
-        if from_transaction not in self:
+        transactions = self.transactions_at_date(from_transaction.date)
+        if from_transaction not in transactions:
             return
         if to_transaction is not None and to_transaction.date != from_transaction.date:
             to_transaction = None
-        transactions = self.transactions_at_date(from_transaction.date)
         transactions.remove(from_transaction)
         if not transactions:
             return
@@ -128,9 +354,39 @@ class TransactionList(list):
         """Equivalent to :meth:`move_before` with ``to_transaction`` to ``None``."""
         self.move_before(transaction, None)
 
+    def reindex(self):
+        """Drops our date and search indexes so that they're rebuilt when next needed.
+
+        Use this when transactions of the list might have been changed without
+        :meth:`reindex_transaction` being called, for example by plugins.
+        """
+        self._date2transactions = None
+        self._transaction2search_keys = None
+        self._substring_indexes = None
+
+    def reindex_transaction(self, transaction, old_date=None):
+        """Updates our indexes after ``transaction`` has been changed.
+
+        If its date has been changed, ``old_date`` is the date it had before. Does nothing if
+        ``transaction`` isn't in the list.
+        """
+        if self._transaction2search_keys is not None and transaction in self._transaction2search_keys:
+            self._unindex_for_search(transaction)
+            self._index_for_search(transaction)
+        index = self._date2transactions
+        if index is None or old_date is None or transaction.date == old_date:
+            return
+        transactions = index.get(old_date)
+        if transactions is None or transaction not in transactions:
+            return
+        transactions.remove(transaction)
+        if not transactions:
+            del index[old_date]
+        index[transaction.date].append(transaction)
+
     def transactions_at_date(self, target_date):
         """Returns a set of all transactions occurring on ``target_date``."""
-        return set(t for t in self if t.date == target_date)
+        return set(self._date_index().get(target_date, ()))
 
     # --- Properties
     @property
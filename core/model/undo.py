@@ -7,6 +7,7 @@
 # http://www.gnu.org/licenses/gpl-3.0.html
 
 import copy
+from itertools import chain
 
 from hscommon.util import extract, flatten
 
@@ -17,7 +18,7 @@ GROUP_SWAP_ATTRS = ['name', 'type']
 TRANSACTION_SWAP_ATTRS = ['date', 'description', 'payee', 'checkno', 'notes', 'position', 'splits']
 SPLIT_SWAP_ATTRS = ['account', 'amount', 'reconciliation_date']
 SCHEDULE_SWAP_ATTRS = ['repeat_type', 'repeat_every', 'stop_date', 'date2exception',
-                       'date2globalchange', 'date2instances']
+                       'date2globalchange', 'date2instances', 'spawn_horizon']
 BUDGET_SWAP_ATTRS = SCHEDULE_SWAP_ATTRS + ['account', 'target', 'amount']
 
 def swapvalues(first, second, attrs):
@@ -95,6 +96,58 @@ class Action:
         """Record imminent changes to ``splits``."""
         self.changed_splits |= set((s, copy.copy(s)) for s in splits)
 
+    def cook_scope(self):
+        """Returns ``(from_date, accounts)``, the :ref:`cooking <cooking>` scope of the action.
+
+        ``from_date`` is the earliest date affected by the action and ``accounts`` is the set of
+        accounts which entries are affected by it. Both sides of the action (before and after) are
+        considered, so the scope is the same whether we undo or redo.
+
+        When we can't determine a narrower scope (for example, when accounts themselves are added,
+        changed or deleted), ``(None, None)`` is returned, which means "cook everything".
+        """
+        if self.added_accounts or self.changed_accounts or self.deleted_accounts:
+            return None, None
+        dates = []
+        accounts = set()
+
+        def add_transaction(txn):
+            dates.append(txn.date)
+            accounts.update(s.account for s in txn.splits)
+
+        def add_schedule(schedule):
+            dates.append(schedule.start_date)
+            exceptions = chain(schedule.date2exception.values(), schedule.date2globalchange.values())
+            dates.extend(exception.date for exception in exceptions if exception is not None)
+            accounts.update(schedule.affected_accounts())
+
+        def add_budget(budget):
+            dates.append(budget.start_date)
+            accounts.update([budget.account, budget.target])
+
+        for txn in self.added_transactions | self.deleted_transactions:
+            add_transaction(txn)
+        for txn, old in self.changed_transactions:
+            add_transaction(txn)
+            add_transaction(old)
+        for split, old in self.changed_splits:
+            dates.append(split.transaction.date)
+            accounts.update([split.account, old.account])
+        for schedule in self.added_schedules | self.deleted_schedules:
+            add_schedule(schedule)
+        for schedule, old in self.changed_schedules:
+            add_schedule(schedule)
+            add_schedule(old)
+        for budget in self.added_budgets | self.deleted_budgets:
+            add_budget(budget)
+        for budget, old in self.changed_budgets:
+            add_budget(budget)
+            add_budget(old)
+        if not dates:
+            return None, None
+        accounts.discard(None)
+        return min(dates), accounts
+
     def delete_accounts(self, accounts, reassign=False):
         """Record the imminent deletion of ``accounts``.
 
@@ -159,16 +212,20 @@ class Undoer:
     def _do_changes(self, action):
         for account, old in action.changed_accounts:
             swapvalues(account, old, ACCOUNT_SWAP_ATTRS)
+            self._accounts.reindex_account(account)
         for group, old in action.changed_groups:
             swapvalues(group, old, GROUP_SWAP_ATTRS)
         for txn, old in action.changed_transactions:
             self._remove_auto_created_account(txn)
+            old_date = txn.date
             swapvalues(txn, old, TRANSACTION_SWAP_ATTRS)
+            self._transactions.reindex_transaction(txn, old_date)
             for split in txn.splits:
                 split.transaction = txn
             self._add_auto_created_accounts(txn)
         for split, old in action.changed_splits:
             swapvalues(split, old, SPLIT_SWAP_ATTRS)
+            self._transactions.reindex_transaction(split.transaction)
         for schedule, old in action.changed_schedules:
             swapvalues(schedule, old, SCHEDULE_SWAP_ATTRS)
             swapvalues(schedule.ref, old.ref, TRANSACTION_SWAP_ATTRS)
@@ -260,6 +317,8 @@ class Undoer:
         action and decrease our pointer to the previous action.
 
         Make sure you can call this with :meth:`can_undo` first.
+
+        Returns the :meth:`Action.cook_scope` of the undone action.
         """
         assert self.can_undo()
         action = self._actions[self._index]
@@ -273,6 +332,7 @@ class Undoer:
         )
         self._do_changes(action)
         self._index -= 1
+        return action.cook_scope()
 
     def redo(self):
         """Redo the next action to be redone.
@@ -281,6 +341,8 @@ class Undoer:
         increase our pointer to the next action.
 
         Make sure you can call this with :meth:`can_redo` first.
+
+        Returns the :meth:`Action.cook_scope` of the redone action.
         """
         assert self.can_redo()
         action = self._actions[self._index + 1]
@@ -294,6 +356,7 @@ class Undoer:
         )
         self._do_changes(action)
         self._index += 1
+        return action.cook_scope()
 
     # --- Properties
     @property
@@ -20,6 +20,8 @@ class BaseSwapFields(ImportActionPlugin):
 
     def perform_action(self, import_document, transactions, panes, selected_rows=None):
         for txn in transactions:
+            # We switch fields on a replica and let change_transaction() apply them so that the
+            # transaction list's indexes follow date changes.
             new = txn.replicate()
             self._switch_function(new)
             import_document.change_transaction(txn, new)
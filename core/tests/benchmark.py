@@ -0,0 +1,256 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+"""Times moneyGuru's heavy operations on synthetic documents.
+
+Usage::
+
+    python -m core.tests.benchmark --transactions 10000 100000 --output results.json
+
+For each document size, a document is generated with :func:`.generate_document` and then loaded,
+cooked, reported on, searched, imported into and saved. We also measure how much memory a loaded
+document takes. Results are written as JSON, which makes it easy to compare runs and catch
+regressions.
+"""
+
+import argparse
+import json
+import os.path as op
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from ..loader import native
+from ..model import currency
+from ..model.currency import Currency, RatesDB
+from ..model.date import DateFormat, YearRange
+from .base import TestApp
+from .synthetic import generate_document, REFERENCE
+
+IMPORT_COUNT = 1000
+
+def timed(func, repeat=1, setup=None):
+    """Calls ``func`` ``repeat`` times and returns the list of durations, in seconds.
+
+    ``setup``, if given, is called before each call and isn't timed.
+    """
+    result = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        result.append(time.perf_counter() - start)
+    return result
+
+def measured(func):
+    """Calls ``func`` and returns how much memory, in bytes, it allocated.
+
+    The result is ``(retained, peak)``. ``retained`` is what is still allocated after the call, so
+    ``func`` has to return what it creates if we want it counted. ``peak`` is the maximum reached
+    during the call.
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained, peak
+
+def use_offline_rates_db():
+    """Makes us, and every :class:`.Application` we create, use an in-memory rates DB.
+
+    Rate providers aren't registered to it. Otherwise, rates would be fetched from the network in
+    the background while we time things.
+    """
+    def initialize_db(path):
+        ratesdb = RatesDB(':memory:', async=False)
+        ratesdb.register_rate_provider = lambda *a: None
+        Currency.set_rates_db(ratesdb)
+
+    currency.initialize_db = initialize_db
+    initialize_db(':memory:')
+
+def import_dicts(app, transactions, count):
+    # Half of our imported transactions match existing splits of the referenced account, the other
+    # half is new.
+    date_format = DateFormat(app.app.date_format).sys_format
+    referenced = [
+        t for t in transactions if any(s.reference is not None for s in t.splits)
+    ][-(count // 2):]
+    result = []
+    for i, txn in enumerate(referenced):
+        split = next(s for s in txn.splits if s.reference is not None)
+        str_date = txn.date.strftime(date_format)
+        result.append({
+            'date': str_date, 'description': txn.description, 'payee': txn.payee,
+            'amount': str(split.amount.value), 'reference': split.reference,
+        })
+        result.append({
+            'date': str_date, 'description': 'imported %d' % i, 'amount': '42',
+            'reference': 'NEW%d' % i,
+        })
+    return result
+
+def run_benchmarks(filename, repeat, generated):
+    """Runs all our benchmarks on the document at ``filename`` and returns the results.
+
+    The result is a list of ``(name, durations)``.
+    """
+    results = []
+
+    def bench(name, func, repeat=repeat, setup=None):
+        results.append((name, timed(func, repeat=repeat, setup=setup)))
+
+    default_currency = generated['accounts'][0].currency
+
+    def load():
+        loader = native.Loader(default_currency)
+        loader.parse(filename)
+        loader.load()
+
+    bench('load.loader', load)
+    app = TestApp()
+    doc = app.doc
+    bench('load.document', lambda: doc.load_from_xml(filename))
+    transactions = doc.transactions
+    last_date = max(t.date for t in transactions)
+    doc.date_range = YearRange(last_date)
+    until_date = doc.date_range.end
+    bench('cook.full', lambda: doc.oven.cook(until_date=until_date))
+    txn = transactions[len(transactions) // 2]
+    bench('cook.incremental', lambda: doc.oven.cook(
+        from_date=txn.date, until_date=until_date, affected_accounts=txn.affected_accounts()
+    ))
+    bench('edit.change_transaction', lambda: doc.change_transactions([txn], description='changed'))
+    app.show_nwview()
+    bench('report.balance_sheet', lambda: app.bsheet.refresh())
+    bench('graph.net_worth', lambda: app.nwgraph.compute())
+    app.show_pview()
+    bench('report.income_statement', lambda: app.istatement.refresh())
+    bench('graph.profit', lambda: app.pgraph.compute())
+    app.show_tview()
+
+    def clear_search():
+        app.sfield.text = ''
+
+    def search(query):
+        def func():
+            app.sfield.text = query
+        return func
+
+    bench('search.text', search(generated['transactions'][0].description.split()[0]), setup=clear_search)
+    bench('search.amount', search('amount:100..200'), setup=clear_search)
+    clear_search()
+    referenced_account = doc.accounts.find_reference(REFERENCE)
+    txn_dicts = import_dicts(app, generated['transactions'], IMPORT_COUNT)
+    bench(
+        'import.match',
+        lambda: app.fake_import(referenced_account.name, txn_dicts, account_reference=REFERENCE),
+        repeat=1
+    )
+    bench('import.apply', lambda: app.iwin.import_selected_pane(), repeat=1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        savepath = op.join(tmpdir, 'saved.moneyguru')
+        bench('save', lambda: doc.save_to_xml(savepath))
+    return results
+
+def run_memory_benchmarks(filename, generated):
+    """Measures the memory taken by the document at ``filename`` once loaded.
+
+    The result is a list of ``(name, retained, peak)``. See :func:`measured`.
+    """
+    default_currency = generated['accounts'][0].currency
+
+    def load():
+        loader = native.Loader(default_currency)
+        loader.parse(filename)
+        loader.load()
+        return loader
+
+    def load_document():
+        app = TestApp()
+        app.doc.load_from_xml(filename)
+        return app
+
+    results = []
+    results.append(('load.loader',) + measured(load))
+    results.append(('load.document',) + measured(load_document))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks moneyGuru on synthetic documents.")
+    parser.add_argument(
+        '--transactions', type=int, nargs='+', default=[10000],
+        help="Number of transactions in the generated documents. One run per number."
+    )
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--groups', type=int, default=6)
+    parser.add_argument('--currencies', default='USD,CAD,EUR', help="Comma-separated currency codes.")
+    parser.add_argument('--schedules', type=int, default=20)
+    parser.add_argument('--budgets', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed runs per benchmark.")
+    parser.add_argument('--output', help="Where to write JSON results. Defaults to stdout.")
+    args = parser.parse_args(argv)
+    use_offline_rates_db()
+    runs = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for transaction_count in args.transactions:
+            parameters = {
+                'transactions': transaction_count,
+                'accounts': args.accounts,
+                'groups': args.groups,
+                'currencies': args.currencies.split(','),
+                'schedules': args.schedules,
+                'budgets': args.budgets,
+                'seed': args.seed,
+            }
+            filename = op.join(tmpdir, 'synthetic%d.moneyguru' % transaction_count)
+            start = time.perf_counter()
+            generated = generate_document(
+                filename, transaction_count=transaction_count, account_count=args.accounts,
+                group_count=args.groups, currencies=parameters['currencies'],
+                schedule_count=args.schedules, budget_count=args.budgets, seed=args.seed
+            )
+            generation_time = time.perf_counter() - start
+            results = run_benchmarks(filename, args.repeat, generated)
+            memory_results = run_memory_benchmarks(filename, generated)
+            runs.append({
+                'parameters': parameters,
+                'file_size': op.getsize(filename),
+                'generation_time': generation_time,
+                'benchmarks': [
+                    {'name': name, 'best': min(durations), 'durations': durations}
+                    for name, durations in results
+                ],
+                'memory': [
+                    {
+                        'name': name, 'retained': retained, 'peak': peak,
+                        'retained_per_transaction': retained / transaction_count,
+                    }
+                    for name, retained, peak in memory_results
+                ],
+            })
+            print("%d transactions: done" % transaction_count, file=sys.stderr)
+    output = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'runs': runs,
+    }
+    if args.output:
+        with open(args.output, 'wt') as fp:
+            json.dump(output, fp, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,7 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
-from datetime import date
+from datetime import date, timedelta
 from collections import defaultdict
 
 from hscommon.testutil import eq_
@@ -88,6 +88,15 @@ class ChangeTransfer(ImportActionPlugin):
         for account in auto_pay_accounts:
             import_document.transactions.reassign_account(account, checking)
 
+class NextDay(ImportActionPlugin):
+    """Moves transactions to the next day by changing their date directly."""
+    NAME = "Next Day Import Plugin"
+    ACTION_NAME = "Move to next day"
+
+    def perform_action(self, import_document, transactions, panes, selected_rows=None):
+        for txn in transactions:
+            txn.date += timedelta(days=1)
+
 class ValueImportBind(ImportBindPlugin):
     """A simple import binder that checks date + description + payee
 
@@ -323,6 +332,18 @@ def test_swap_date_texts_after_swap(app):
     app.iwin.selected_pane_index = 1
     eq_(app.iwin.swap_type_list[0], "MM/dd/yy --> dd/MM/yy")
 
+@with_app(app_import_checkbook_qif)
+def test_swap_date_follows_date_index(app):
+    # Transactions are found at their new date after a date swap.
+    transactions = app.iwin.selected_pane.import_document.transactions
+    txn = [t for t in transactions if t.date.day != t.date.month][0]
+    old_date = txn.date
+    transactions.transactions_at_date(old_date) # build the index
+    app.iwin.perform_swap() # Swap Day <--> Month
+    assert txn.date != old_date
+    assert txn in transactions.transactions_at_date(txn.date)
+    assert txn not in transactions.transactions_at_date(old_date)
+
 # ---
 def app_import_checkbook_qif_twice():
     app = TestApp()
@@ -372,6 +393,20 @@ def test_import(app):
     app.show_account()
     eq_(app.etable_count(), 7) # The entries have been added
 
+@with_app(app_import_checkbook_qif_with_existing_txns)
+def test_import_merges_string_pool(app):
+    # Imports are parsed in their own string pool. Only the strings of what is actually imported
+    # end up in the document's pool.
+    pool = app.doc.string_pool
+    assert 'Power Bill' not in pool
+    app.iwin.import_selected_pane()
+    assert 'Power Bill' in pool
+    for txn in app.doc.transactions:
+        assert txn.description is pool[txn.description]
+        assert txn.payee is pool[txn.payee]
+        for split in txn.splits:
+            assert split.memo is pool[split.memo]
+
 @with_app(app_import_checkbook_qif_with_existing_txns)
 def test_match_then_import(app):
     # The entry matching has the correct effect on the import
@@ -770,3 +805,25 @@ def test_switch_transfer_accounts(app):
     eq_(app.itable[1].transfer_import, 'checking')
     eq_(app.itable[2].transfer_import, 'GAS')
 
+
+# ---
+def app_import_checkbook_qif_with_next_day_plugin():
+    app = TestApp()
+    app.set_plugins([NextDay])
+    app.doc.date_range = YearRange(date(2007, 1, 1))
+    app.mw.parse_file_for_import(testdata.filepath('qif/checkbook.qif'))
+    return app
+
+@with_app(app_import_checkbook_qif_with_next_day_plugin)
+def test_plugin_changing_dates_directly(app):
+    # A plugin changing dates without telling the transaction list doesn't leave its date index
+    # stale.
+    transactions = app.iwin.selected_pane.import_document.transactions
+    txn = transactions[0]
+    old_date = txn.date
+    transactions.transactions_at_date(old_date) # build the index
+    app.iwin.swap_type_list.select(-1)
+    app.iwin.perform_swap()
+    eq_(txn.date, old_date + timedelta(days=1))
+    assert txn in transactions.transactions_at_date(txn.date)
+    assert txn not in transactions.transactions_at_date(old_date)
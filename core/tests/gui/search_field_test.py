@@ -68,6 +68,17 @@ def test_query_amount_negative(app):
     eq_(app.ttable.row_count, 1)
     eq_(app.ttable[0].description, 'Withdrawal')
 
+@with_app(app_two_transactions)
+def test_query_amount_range(app):
+    # Amount ranges are inclusive and their bounds can be given in any order.
+    app.sfield.text = 'amount:100..140'
+    eq_(app.ttable.row_count, 1)
+    eq_(app.ttable[0].description, 'Withdrawal')
+    app.sfield.text = '250..140'
+    eq_(app.ttable.row_count, 2)
+    app.sfield.text = 'amount:100..' # incomplete ranges are ignored
+    eq_(app.ttable.row_count, 0)
+
 @with_app(app_two_transactions)
 def test_query_description(app):
     # The query is case insensitive and works on description.
@@ -106,6 +106,17 @@ def test_memo():
     eq_(stable[0].memo, 'memo1')
     eq_(stable[1].memo, 'memo2')
 
+def test_memo_goes_through_string_pool():
+    # Memos edited in the split table end up in the document's string pool.
+    app = app_one_entry()
+    pooled = app.doc.string_pool.intern(''.join(['me', 'mo']))
+    tpanel = app.mw.edit_item()
+    stable = tpanel.split_table
+    stable.selected_row.memo = ''.join(['m', 'emo'])
+    stable.save_edits()
+    tpanel.save()
+    assert app.doc.transactions[0].splits[0].memo is pooled
+
 def test_set_wrong_values_for_attributes():
     # set_attribute_value catches ValueError.
     app = app_one_entry()
@@ -4,13 +4,18 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+import json
+import os
+import os.path as op
+import re
 from datetime import date
 
 from hscommon.testutil import eq_
 
 from ..document import ScheduleScope
 from ..model.account import AccountType
-from ..model.currency import Currency, CAD
+from ..model.amount import Amount
+from ..model.currency import Currency, CAD, USD
 from ..model.date import MonthRange
 from .base import compare_apps, TestApp, with_app, testdata
 
@@ -36,6 +41,103 @@ def test_saved_file_starts_with_xml_header(tmpdir):
     contents = fp.read()
     assert contents.startswith('<?xml version="1.0" encoding="utf-8"?>\n')
 
+def test_special_characters_round_trip(tmpdir):
+    # Characters that have to be escaped in XML attributes are correctly saved and loaded.
+    app = TestApp()
+    app.add_txn(description='a & b <c> "d"', payee="'e'")
+    filepath = str(tmpdir.join('foo.xml'))
+    app.doc.save_to_xml(filepath)
+    app.doc.load_from_xml(filepath)
+    eq_(app.ttable[0].description, 'a & b <c> "d"')
+    eq_(app.ttable[0].payee, "'e'")
+
+def test_testdata_files_round_trip(tmpdir):
+    # Saving a loaded test file gives the file in "moneyguru_saved", which is what we wrote back
+    # when we used ElementTree to save. Loading and saving it again gives the same file.
+    def without_document_id(data):
+        # Files without a document_id get a random one when saved.
+        return re.sub(rb'document_id="[0-9a-f]*"', b'document_id=""', data)
+
+    dirpath = testdata.filepath('moneyguru')
+    for filename in sorted(os.listdir(dirpath)):
+        if filename == 'unsupported_currency.moneyguru':
+            continue
+        app = TestApp()
+        app.doc.load_from_xml(op.join(dirpath, filename))
+        filepath1 = str(tmpdir.join('first.xml'))
+        app.doc.save_to_xml(filepath1)
+        with open(filepath1, 'rb') as fp1, open(testdata.filepath('moneyguru_saved', filename), 'rb') as fp:
+            eq_(without_document_id(fp1.read()), without_document_id(fp.read()))
+        newapp = TestApp()
+        newapp.doc.load_from_xml(filepath1)
+        filepath2 = str(tmpdir.join('second.xml'))
+        newapp.doc.save_to_xml(filepath2)
+        with open(filepath1, 'rb') as fp1, open(filepath2, 'rb') as fp2:
+            eq_(fp1.read(), fp2.read())
+
+def test_cooked_cache(tmpdir, monkeypatch):
+    # When we have a cache path, balances at the start of the cooked window are cached when loading
+    # (and saving) and re-used when we load the same file again.
+    monkeypatch.patch_today(2016, 6, 15)
+    app = TestApp()
+    cache_path = str(tmpdir.join('cache'))
+    os.mkdir(cache_path)
+    app.app.cache_path = cache_path
+    app.add_account('Checking')
+    app.show_account()
+    app.add_entry('01/02/2010', increase='42')
+    filepath = str(tmpdir.join('foo.moneyguru'))
+    app.doc.save_to_xml(filepath)
+    newapp = TestApp(app=app.app)
+    newapp.doc.load_from_xml(filepath)
+    checking = newapp.doc.accounts.find('Checking')
+    eq_(checking.entries.balance(), Amount(42, USD))
+    cachefile = op.join(cache_path, os.listdir(cache_path)[0])
+    # We tamper with our cache to make sure that it's used.
+    with open(cachefile, 'rt') as fp:
+        cache = json.load(fp)
+    cache['accounts']['Checking'][2] = 'USD 12.00' # balance
+    with open(cachefile, 'wt') as fp:
+        json.dump(cache, fp)
+    newapp = TestApp(app=app.app)
+    newapp.doc.load_from_xml(filepath)
+    checking = newapp.doc.accounts.find('Checking')
+    eq_(checking.entries.balance(), Amount(12, USD))
+    # But it's not used if the file changed.
+    with open(filepath, 'at') as fp:
+        fp.write('\n')
+    newapp = TestApp(app=app.app)
+    newapp.doc.load_from_xml(filepath)
+    checking = newapp.doc.accounts.find('Checking')
+    eq_(checking.entries.balance(), Amount(42, USD))
+
+def test_cooked_cache_after_reconciling_history(tmpdir, monkeypatch):
+    # Reconciling an entry from before the cached checkpoint invalidates the checkpoint. Otherwise,
+    # we'd save it along with the new file and load stale reconciled balances from it.
+    monkeypatch.patch_today(2016, 6, 15)
+    app = TestApp()
+    cache_path = str(tmpdir.join('cache'))
+    os.mkdir(cache_path)
+    app.app.cache_path = cache_path
+    app.add_account('Checking')
+    app.show_account()
+    app.add_entry('01/02/2010', increase='42')
+    filepath = str(tmpdir.join('foo.moneyguru'))
+    app.doc.save_to_xml(filepath)
+    newapp = TestApp(app=app.app)
+    newapp.doc.load_from_xml(filepath)
+    newapp.drsel.select_all_transactions_range()
+    newapp.show_nwview()
+    newapp.bsheet.selected = newapp.bsheet.assets[0]
+    newapp.show_account()
+    newapp.aview.toggle_reconciliation_mode()
+    newapp.etable[0].toggle_reconciled()
+    newapp.doc.save_to_xml(filepath)
+    newapp = TestApp(app=app.app)
+    newapp.doc.load_from_xml(filepath)
+    checking = newapp.doc.accounts.find('Checking')
+    eq_(checking.entries.balance_of_reconciled(), Amount(42, USD))
+
 # ---
 class TestLoadFile:
     # Loads 'simple.moneyguru', a file with 2 accounts and 2 entries in each. Select the first entry.
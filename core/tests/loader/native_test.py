@@ -40,6 +40,18 @@ def test_parse_minimal(loader):
     except FileFormatError:
         assert False
 
+def test_only_root_transactions_are_transactions(loader):
+    # Transaction elements in schedules aren't loaded as regular transactions.
+    content = b"""<moneyguru-file>
+    <recurrence type="daily"><transaction date="2008-01-01"><split account="foo" amount="1" /></transaction></recurrence>
+    <transaction date="2008-01-02"><split account="foo" amount="2" /></transaction>
+    </moneyguru-file>"""
+    loader._parse(BytesIO(content))
+    loader.load()
+    eq_(len(loader.transaction_infos), 1)
+    eq_(loader.transaction_infos[0].date, date(2008, 1, 2))
+    eq_(len(loader.recurrence_infos), 1)
+
 def test_wrong_date(loader):
     # these used to raise FileFormatError, but now, we just want to make sure that there is no
     # crash.
@@ -122,3 +134,25 @@ def test_unsupported_currency(loader):
     with raises(FileFormatError):
         loader.load()
 
+
+def test_load_without_cooking(loader):
+    # When we tell the loader not to cook, loaded accounts don't get any entries.
+    PLN = Currency.register('PLN', 'PLN')
+    loader.parse(testdata.filepath('moneyguru', 'simple.moneyguru'))
+    loader.load(cook=False)
+    eq_(len(loader.transactions), 4)
+    for account in loader.accounts:
+        eq_(len(account.entries), 0)
+
+def test_load_interns_strings(loader):
+    # Loaded descriptions, payees and memos go through the loader's string pool, so equal strings
+    # are the same instance.
+    Currency.register('PLN', 'PLN')
+    loader.parse(testdata.filepath('moneyguru', 'simple.moneyguru'))
+    loader.load()
+    pool = loader.string_pool
+    for txn in loader.transactions:
+        assert txn.description is pool[txn.description]
+        assert txn.payee is pool[txn.payee]
+        for split in txn.splits:
+            assert split.memo is pool[split.memo]
@@ -104,7 +104,7 @@ def test_load_empty(monkeypatch):
     # When loading an empty file (we mock it here), make sure no exception occur.
     app = TestApp()
     monkeypatch.setattr(base.Loader, 'parse', lambda self, filename: None)
-    monkeypatch.setattr(base.Loader, 'load', lambda self: None)
+    monkeypatch.setattr(base.Loader, 'load', lambda self, cook=True: None)
     app.doc.load_from_xml('filename does not matter here')
 
 def test_modified_flag():
@@ -86,3 +86,81 @@ class TestOneAccount:
         # Each entry is converted using the entry's day rate.
         eq_(self.account.entries.cash_flow(range, CAD), Amount(201.40, CAD))
 
+
+    def test_cash_flow_ranges(self):
+        # Cash flow for ranges that don't align with entry dates.
+        entries = self.account.entries
+        eq_(entries.cash_flow(MonthRange(date(2007, 12, 1))), Amount(20, USD))
+        eq_(entries.cash_flow(MonthRange(date(2008, 2, 1))), 0)
+        eq_(entries.cash_flow(MonthRange(date(2007, 11, 1))), 0)
+
+    def test_cash_flow_after_clear(self):
+        # Clearing entries also clears cash flow information for the cleared dates.
+        entries = self.account.entries
+        range = MonthRange(date(2008, 1, 1))
+        entries.cash_flow(range, CAD)
+        entries.clear(date(2008, 1, 3))
+        eq_(entries.cash_flow(range), Amount(150, USD))
+        eq_(entries.cash_flow(range, CAD), Amount(130, CAD))
+
+    def test_dates_in_range(self):
+        range = MonthRange(date(2008, 1, 1))
+        expected = [date(2008, 1, 1), date(2008, 1, 2), date(2008, 1, 3), date(2008, 1, 31)]
+        eq_(self.account.entries.dates_in_range(range), expected)
+        eq_(self.account.entries.dates_in_range(MonthRange(date(2008, 2, 1))), [])
+
+
+class TestAccountListLookups:
+    def setup_method(self, method):
+        self.accounts = AccountList(USD)
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.checking.account_number = '1000'
+        self.checking.reference = 'ref1'
+        self.savings = Account('Savings', USD, AccountType.Asset)
+        self.savings.account_number = '10'
+        self.accounts.add(self.checking)
+        self.accounts.add(self.savings)
+
+    def test_find_by_name(self):
+        # Names are matched case insensitively and without surrounding whitespace.
+        eq_(self.accounts.find(' savings '), self.savings)
+        assert self.accounts.find('foo') is None
+
+    def test_find_by_account_number(self):
+        # An account matches when the name starts with its number. When there are many matches, the
+        # first account in the list wins.
+        eq_(self.accounts.find('1000 foo'), self.checking)
+        eq_(self.accounts.find('10 foo'), self.savings)
+
+    def test_find_reference(self):
+        eq_(self.accounts.find_reference('ref1'), self.checking)
+        assert self.accounts.find_reference('ref2') is None
+        other = Account('Other', USD, AccountType.Asset)
+        other.reference = 'ref1'
+        self.accounts.add(other) # same reference, not added
+        eq_(len(self.accounts), 2)
+
+    def test_set_account_name(self):
+        self.accounts.set_account_name(self.savings, 'Foo')
+        assert self.accounts.find('savings') is None
+        eq_(self.accounts.find('foo'), self.savings)
+
+    def test_reindex_account(self):
+        # After a direct change to an account's number or reference, reindex_account() updates the
+        # lookups. The account keeps its place in the list order.
+        self.savings.account_number = '2000'
+        self.savings.reference = 'ref2'
+        self.accounts.reindex_account(self.savings)
+        assert self.accounts.find('10 foo') is None
+        eq_(self.accounts.find('2000'), self.savings)
+        eq_(self.accounts.find_reference('ref2'), self.savings)
+        self.checking.account_number = '2'
+        self.accounts.reindex_account(self.checking)
+        eq_(self.accounts.find('2000'), self.checking)
+
+    def test_remove_and_clear(self):
+        self.accounts.remove(self.checking)
+        assert self.accounts.find('checking') is None
+        assert self.accounts.find_reference('ref1') is None
+        self.accounts.clear()
+        assert self.accounts.find('savings') is None
@@ -0,0 +1,64 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountType
+from ...model.amount import Amount
+from ...model.budget import AccountTransactionIndex, Budget
+from ...model.currency import USD
+from ...model.transaction import Transaction
+
+class TestAccountTransactionIndex:
+    def setup_method(self, method):
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.expense = Account('Expense', USD, AccountType.Expense)
+        self.other = Account('Other', USD, AccountType.Expense)
+        self.txns = []
+        # Out of order on purpose, the index sorts them.
+        for day in [12, 3, 20, 3, 31]:
+            txn = Transaction(date(2008, 1, day), account=self.checking, amount=Amount(day, USD))
+            txn.splits[1].account = self.expense
+            self.txns.append(txn)
+        self.index = AccountTransactionIndex(self.txns, {self.expense, self.other})
+
+    def test_range_is_inclusive(self):
+        result = self.index.transactions_in_range(self.expense, date(2008, 1, 3), date(2008, 1, 20))
+        eq_([t.date.day for t in result], [3, 3, 12, 20])
+
+    def test_empty_range(self):
+        result = self.index.transactions_in_range(self.expense, date(2008, 1, 4), date(2008, 1, 11))
+        eq_(result, [])
+
+    def test_account_without_transactions(self):
+        result = self.index.transactions_in_range(self.other, date.min, date.max)
+        eq_(result, [])
+
+    def test_unindexed_account(self):
+        # Only the accounts given at creation are indexed.
+        result = self.index.transactions_in_range(self.checking, date.min, date.max)
+        eq_(result, [])
+
+
+class TestBudgetSpawns:
+    def setup_method(self, method):
+        self.expense = Account('Expense', USD, AccountType.Expense)
+        self.budget = Budget(self.expense, None, Amount(100, USD), date(2000, 1, 1))
+        self.index = AccountTransactionIndex([], {self.expense})
+
+    def spawn_dates(self):
+        spawns = self.budget.get_spawns(date(2008, 8, 31), self.index, set())
+        return [s.recurrence_date for s in spawns]
+
+    def test_past_periods_are_not_spawned(self, monkeypatch):
+        # We start spawning at the period containing tomorrow.
+        monkeypatch.patch_today(2008, 6, 30)
+        eq_(self.spawn_dates(), [date(2008, 7, 1), date(2008, 8, 1)])
+        monkeypatch.patch_today(2008, 6, 15)
+        eq_(self.spawn_dates(), [date(2008, 6, 1), date(2008, 7, 1), date(2008, 8, 1)])
+        eq_(len(self.budget.date2instances), 3)
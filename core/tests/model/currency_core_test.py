@@ -10,7 +10,7 @@
 # I had to quickly find a place for it, but we could eventually merge this unit with its
 # current currency_test neighbor.
 
-from datetime import date
+from datetime import date, timedelta
 import sqlite3 as sqlite
 
 from hscommon.testutil import eq_, assert_almost_equal
@@ -109,8 +109,8 @@ def test_set_rate_after_get():
     assert_almost_equal(CAD.value_in(USD, date(2008, 4, 20)), 42)
 
 def test_set_rate_after_get_the_day_after():
-    # When setting a rate, the cache for the whole currency is reset, or else we get old fallback
-    # values for dates where the currency server returned no value.
+    # When setting a rate, the cached fallback values of the following days are updated, or else we
+    # get old fallback values for dates where the currency server returned no value.
     setup_daily_rate()
     CAD.value_in(USD, date(2008, 4, 21)) # value will be cached
     USD.set_CAD_value(1/42, date(2008, 4, 20))
@@ -148,6 +148,27 @@ def test_seek_rate_before():
     setup_two_daily_rate()
     eq_(USD.value_in(CAD, date(2008, 4, 19)), 1/0.996115)
 
+def test_set_rate_in_gap_after_get():
+    # Setting a rate in a gap updates the filled values of the following days, but only until the
+    # next date having its own rate.
+    setup_two_daily_rate()
+    USD.value_in(CAD, date(2008, 4, 22)) # rates are loaded
+    USD.set_CAD_value(42, date(2008, 4, 22))
+    eq_(USD.value_in(CAD, date(2008, 4, 21)), 1/0.996115)
+    eq_(USD.value_in(CAD, date(2008, 4, 24)), 42)
+    eq_(USD.value_in(CAD, date(2008, 4, 26)), 1/0.997115)
+
+def test_set_rate_outside_range_after_get():
+    # Setting rates before and after the loaded rates correctly extends them.
+    setup_two_daily_rate()
+    USD.value_in(CAD, date(2008, 4, 22)) # rates are loaded
+    USD.set_CAD_value(42, date(2008, 4, 15))
+    USD.set_CAD_value(43, date(2008, 4, 30))
+    eq_(USD.value_in(CAD, date(2008, 4, 14)), 42)
+    eq_(USD.value_in(CAD, date(2008, 4, 19)), 42)
+    eq_(USD.value_in(CAD, date(2008, 4, 29)), 1/0.997115)
+    eq_(USD.value_in(CAD, date(2008, 5, 1)), 43)
+
 # --- Rates of multiple currencies
 def setup_rates_of_multiple_currencies():
     USD.set_CAD_value(1/0.996115, date(2008, 4, 20))
@@ -213,3 +234,20 @@ def test_currency_with_stop_date():
     setup_db_raising_error_on_getrate()
     eq_(BAR.value_in(CAD, date(2010, 1, 13)), 2)
 
+
+# --- Fetched rates
+def test_fetched_rates_fill_voids():
+    # Fetched rates are saved along with filled values for the days the provider had no rate for.
+    # Those filled values are the rates of the closest previous day.
+    db = RatesDB(':memory:', async=False)
+    start = date.today() - timedelta(days=10)
+    db.register_rate_provider(lambda currency, start_date, end_date: [
+        (start + timedelta(days=2), 2), (start + timedelta(days=5), 5)
+    ])
+    db.ensure_rates(start, ['USD'])
+    eq_(db.get_rate(start, 'USD', 'CAD'), 2)
+    eq_(db.get_rate(start + timedelta(days=4), 'USD', 'CAD'), 2)
+    eq_(db.get_rate(start + timedelta(days=6), 'USD', 'CAD'), 5)
+    eq_(db.date_range('USD'), (start, date.today() - timedelta(days=1)))
+    sql = "select count(*) from rates where currency = 'USD'"
+    eq_(db.con.execute(sql).fetchone()[0], 10)
@@ -10,7 +10,7 @@ import time
 from pytest import raises
 from hscommon.testutil import jointhreads, eq_
 
-from ...model.amount import convert_amount
+from ...model.amount import convert_amount, convert_amounts, sum_converted_amounts
 from ...model.amount import Amount
 from ...model.currency import Currency, USD, CAD, RateProviderUnavailable, RatesDB
 from ...plugin import boc_currency_provider
@@ -64,6 +64,17 @@ def test_seek_rate():
     eq_(convert_amount(amount, CAD, date(2008, 5, 21)), expected)
     eq_(convert_amount(amount, CAD, date(2008, 5, 19)), expected)
 
+def test_convert_amounts():
+    # convert_amounts() gives the same results as convert_amount() on each amount.
+    set_ratedb_for_tests()
+    USD.set_CAD_value(0.98, date(2008, 5, 20))
+    USD.set_CAD_value(0.97, date(2008, 5, 22))
+    amounts = [Amount(42, USD), Amount(12, CAD), 0, Amount(43, USD), Amount(44, USD)]
+    dates = [date(2008, 5, 21), date(2008, 5, 21), date(2008, 5, 21), date(2008, 5, 21), date(2008, 5, 22)]
+    expected = [convert_amount(a, CAD, d) for a, d in zip(amounts, dates)]
+    eq_(convert_amounts(amounts, CAD, dates), expected)
+    eq_(sum_converted_amounts(amounts, CAD, dates), sum(expected))
+
 # ---
 def test_ask_for_rates_in_the_past():
     # If a rate is asked for a date lower than the lowest fetched date, fetch that range.
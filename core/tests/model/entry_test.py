@@ -0,0 +1,77 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date, timedelta
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.entry import Entry, EntryList, RECONCILED_CHECKPOINT_INTERVAL
+from ...model.transaction import Transaction
+
+class TestClear:
+    def setup_method(self, method):
+        self.account = Account('Checking', USD, AccountType.Asset)
+        self.entries = EntryList(self.account)
+        # Enough entries to have a few reconciled checkpoints. Every 7th entry is reconciled, some
+        # of them a week or two later, so reconciliation order isn't entry order.
+        self.count = RECONCILED_CHECKPOINT_INTERVAL * 3 + 10
+        balance = 0
+        for i in range(self.count):
+            txn_date = date(2008, 1, 1) + timedelta(days=i)
+            amount = Amount(i + 1, USD)
+            balance += amount
+            entry = self.make_entry(txn_date, amount, balance)
+            if i % 7 == 0:
+                entry.split.reconciliation_date = txn_date + timedelta(days=7 * (i % 3))
+            self.entries.add_entry(entry)
+
+    def make_entry(self, txn_date, amount, balance):
+        txn = Transaction(txn_date, account=self.account, amount=amount)
+        return Entry(txn.splits[0], amount, balance, 0, balance)
+
+    def expected_last_reconciled(self):
+        reconciled = [e for e in self.entries if e.reconciled]
+        return max(reconciled, key=lambda e: e.reconciliation_key) if reconciled else None
+
+    def test_clear_in_the_middle(self):
+        for days in [600, RECONCILED_CHECKPOINT_INTERVAL * 2, 300, 20, 3]:
+            from_date = date(2008, 1, 1) + timedelta(days=days)
+            self.entries.clear(from_date)
+            eq_(len(self.entries), days)
+            eq_(self.entries.last_entry().date, from_date - timedelta(days=1))
+            assert self.entries._last_reconciled is self.expected_last_reconciled()
+
+    def test_add_after_clear(self):
+        # Entries added after a clear are correctly indexed and checkpointed.
+        from_date = date(2008, 1, 1) + timedelta(days=RECONCILED_CHECKPOINT_INTERVAL - 1)
+        self.entries.clear(from_date)
+        balance = self.entries.balance()
+        for i in range(RECONCILED_CHECKPOINT_INTERVAL * 2):
+            txn_date = from_date + timedelta(days=i)
+            balance += Amount(1, USD)
+            entry = self.make_entry(txn_date, Amount(1, USD), balance)
+            entry.split.reconciliation_date = txn_date
+            self.entries.add_entry(entry)
+        eq_([e.index for e in self.entries], list(range(len(self.entries))))
+        self.entries.clear(from_date + timedelta(days=RECONCILED_CHECKPOINT_INTERVAL + 4))
+        assert self.entries._last_reconciled is self.expected_last_reconciled()
+        eq_(self.entries.last_entry().date, from_date + timedelta(days=RECONCILED_CHECKPOINT_INTERVAL + 3))
+
+    def test_clear_after_last_entry(self):
+        # Clearing from after our last entry doesn't change anything.
+        last_reconciled = self.entries._last_reconciled
+        self.entries.clear(date(2020, 1, 1))
+        eq_(len(self.entries), self.count)
+        assert self.entries._last_reconciled is last_reconciled
+
+    def test_clear_everything(self):
+        self.entries.clear(date(2008, 1, 1))
+        eq_(len(self.entries), 0)
+        assert self.entries._last_reconciled is None
+        eq_(self.entries.balance_of_reconciled(), 0)
@@ -0,0 +1,256 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountList, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.date import DateRange
+from ...model.oven import Oven
+from ...model.transaction import Transaction
+from ...model.transaction_list import TransactionList
+
+def entries_values(account):
+    return [(e.date, e.amount, e.balance, e.reconciled_balance, e.balance_with_budget) for e in account.entries]
+
+class TestPartialCook:
+    def setup_method(self, method):
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.savings = Account('Savings', USD, AccountType.Asset)
+        self.expense = Account('Expense', USD, AccountType.Expense)
+        self.income = Account('Income', USD, AccountType.Income)
+        self.accounts = AccountList(USD)
+        for account in [self.checking, self.savings, self.expense, self.income]:
+            self.accounts.add(account)
+        self.transactions = TransactionList()
+        for day in range(1, 29):
+            txn = Transaction(date(2008, 1, day), account=self.checking, amount=Amount(day, USD))
+            txn.splits[1].account = self.expense
+            self.transactions.add(txn)
+            txn = Transaction(date(2008, 1, day), account=self.savings, amount=Amount(day * 2, USD))
+            txn.splits[1].account = self.income
+            self.transactions.add(txn)
+        self.oven = Oven(self.accounts, self.transactions, [], [])
+        self.oven.cook(date.min, date(2008, 1, 31))
+
+    def test_balances_same_as_full_cook(self):
+        # Cooking only affected accounts yields the same balances as a full cook.
+        txn = self.transactions[10]
+        affected = txn.affected_accounts()
+        txn.splits[0].amount = Amount(42, USD)
+        txn.splits[1].amount = Amount(-42, USD)
+        self.oven.cook(txn.date, date(2008, 1, 31), affected_accounts=affected)
+        partial = {a.name: entries_values(a) for a in self.accounts}
+        self.oven.cook(date.min, date(2008, 1, 31))
+        full = {a.name: entries_values(a) for a in self.accounts}
+        eq_(partial, full)
+
+    def test_untouched_accounts_not_recooked(self):
+        # Entries of accounts that aren't affected by a change are left intact.
+        savings_entries = list(self.savings.entries)
+        txn = self.transactions[10]
+        assert self.savings not in txn.affected_accounts()
+        txn.splits[0].amount = Amount(42, USD)
+        txn.splits[1].amount = Amount(-42, USD)
+        self.oven.cook(txn.date, date(2008, 1, 31), affected_accounts=txn.affected_accounts())
+        assert all(e1 is e2 for e1, e2 in zip(savings_entries, self.savings.entries))
+        eq_(len(savings_entries), len(self.savings.entries))
+        eq_(self.checking.entries.balance(), Amount(sum(range(1, 29)) - 6 + 42, USD))
+
+    def test_moved_split(self):
+        # When a split is reassigned to another account, both old and new accounts have to be
+        # passed as affected.
+        txn = self.transactions[10]
+        affected = txn.affected_accounts()
+        txn.splits[1].account = self.income
+        affected |= txn.affected_accounts()
+        self.oven.cook(txn.date, date(2008, 1, 31), affected_accounts=affected)
+        partial = {a.name: entries_values(a) for a in self.accounts}
+        self.oven.cook(date.min, date(2008, 1, 31))
+        full = {a.name: entries_values(a) for a in self.accounts}
+        eq_(partial, full)
+
+    def test_different_until_date_cooks_everything(self):
+        # When we cook until another date than last time, we can't restrict ourselves to affected
+        # accounts.
+        savings_entries = list(self.savings.entries)
+        txn = self.transactions[10]
+        self.oven.cook(txn.date, date(2008, 2, 29), affected_accounts=txn.affected_accounts())
+        assert self.savings.entries[-1] is not savings_entries[-1]
+
+    def test_chained_reconciliation_overlaps(self):
+        # When a split before from_date is reconciled after it, we cook from that split's date, and
+        # so on.
+        self.transactions[8].splits[0].reconciliation_date = date(2008, 1, 12) # Jan 5
+        self.transactions[18].splits[0].reconciliation_date = date(2008, 1, 20) # Jan 10
+        self.transactions[30].splits[0].reconciliation_date = date(2008, 1, 16) # Jan 16
+        self.oven.cook(date.min, date(2008, 1, 31))
+        eq_(self.oven._cook_from(date(2008, 1, 15)), date(2008, 1, 5))
+        eq_(self.oven._cook_from(date(2008, 1, 21)), date(2008, 1, 21))
+        txn = self.transactions[40] # Jan 21
+        txn.splits[0].reconciliation_date = date(2008, 1, 22)
+        self.oven.cook(date(2008, 1, 21), date(2008, 1, 31), affected_accounts=txn.affected_accounts())
+        # A new cook updates our reconciliation index.
+        eq_(self.oven._cook_from(date(2008, 1, 22)), date(2008, 1, 21))
+        partial = {a.name: entries_values(a) for a in self.accounts}
+        self.oven.cook(date.min, date(2008, 1, 31))
+        full = {a.name: entries_values(a) for a in self.accounts}
+        eq_(partial, full)
+
+
+class TestCookWindow:
+    def setup_method(self, method):
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.expense = Account('Expense', USD, AccountType.Expense)
+        self.income = Account('Income', USD, AccountType.Income)
+        self.accounts = AccountList(USD)
+        for account in [self.checking, self.expense, self.income]:
+            self.accounts.add(account)
+        self.transactions = TransactionList()
+        for month in [1, 2]:
+            for day in range(1, 29):
+                txn = Transaction(date(2008, month, day), account=self.checking, amount=Amount(day, USD))
+                txn.splits[1].account = self.income if day % 2 else self.expense
+                if month == 1 and day % 3 == 0:
+                    txn.splits[0].reconciliation_date = txn.date
+                self.transactions.add(txn)
+        # This one is reconciled after our window starts.
+        self.transactions[9].splits[0].reconciliation_date = date(2008, 2, 5)
+        self.oven = Oven(self.accounts, self.transactions, [], [])
+        self.window = DateRange(date(2008, 2, 1), date(2008, 2, 29))
+
+    def cooked_values(self):
+        result = {}
+        for account in self.accounts:
+            entries = account.entries
+            result[account.name] = (
+                [(e.date, e.amount, e.balance, e.reconciled_balance, e.balance_with_budget)
+                 for e in entries.entries_in_range(self.window)],
+                entries.balance(date(2008, 2, 10)),
+                entries.balance(date(2008, 1, 31)),
+                entries.last_entry(date(2008, 1, 31)).reconciled_balance,
+                entries.balance_of_reconciled(),
+                entries.cash_flow(self.window),
+            )
+        return result
+
+    def test_same_values_as_full_cook(self):
+        # Within the cooked window, values are the same as with a full cook.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        window_values = self.cooked_values()
+        # Our reconciled split from january had to be cooked with the window.
+        eq_(self.oven.transactions[0].date, date(2008, 1, 10))
+        self.oven.cook(date.min, date(2008, 2, 29))
+        eq_(window_values, self.cooked_values())
+
+    def test_history_cooked_on_demand(self):
+        # Accessing entries before the window cooks everything.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        eq_(len(self.checking.entries), 56)
+        eq_(len(self.oven.transactions), 56)
+        eq_(self.checking.entries[0].balance, Amount(1, USD))
+
+    def test_cook_history(self):
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        self.oven.cook_history(date(2008, 1, 15)) # already cooked because of the reconciled split
+        eq_(len(self.oven.transactions), 47)
+        self.oven.cook_history(date(2008, 1, 5))
+        eq_(len(self.oven.transactions), 56)
+
+    def test_change_before_window(self):
+        # Re-cooking from a date before the window cooks everything.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        txn = self.transactions[0]
+        txn.splits[0].amount = Amount(42, USD)
+        txn.splits[1].amount = Amount(-42, USD)
+        self.oven.cook(txn.date, date(2008, 2, 29), affected_accounts=txn.affected_accounts())
+        eq_(len(self.oven.transactions), 56)
+        eq_(self.checking.entries.balance(date(2008, 1, 1)), Amount(42, USD))
+
+    def test_toggle_reconciled(self):
+        # Toggling reconciliation gives the same reconciled balances as a full cook, including
+        # for entries reconciled later than their date.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        splits = [self.transactions[i].splits[0] for i in [11, 30, 31, 40]]
+        for split in splits:
+            split.reconciliation_date = None if split.reconciled else split.transaction.date
+        self.oven.toggle_reconciled(splits)
+        cooked_range = DateRange(date(2008, 1, 10), date(2008, 2, 29))
+        def reconciled_balances():
+            entries = self.checking.entries.entries_in_range(cooked_range)
+            return [(e.date, e.reconciled_balance) for e in entries]
+
+        toggled_values = self.cooked_values()
+        toggled_balances = reconciled_balances()
+        self.oven.cook(date.min, date(2008, 2, 29))
+        eq_(toggled_values, self.cooked_values())
+        eq_(toggled_balances, reconciled_balances())
+
+    def test_toggle_reconciled_in_uncooked_history(self):
+        # Splits that don't have entries yet because they're in uncooked history are cooked.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        split = self.transactions[0].splits[0]
+        split.reconciliation_date = split.transaction.date
+        self.oven.toggle_reconciled([split])
+        eq_(len(self.oven.transactions), 56)
+        toggled_values = self.cooked_values()
+        self.oven.cook(date.min, date(2008, 2, 29))
+        eq_(toggled_values, self.cooked_values())
+
+    def test_checkpoint_invalidated_by_toggling_history(self):
+        # Toggling the reconciliation of a split before our checkpoint makes its reconciled balances
+        # wrong.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        self.oven.cook_history(date(2008, 1, 1))
+        split = self.transactions[0].splits[0]
+        split.reconciliation_date = split.transaction.date
+        self.oven.toggle_reconciled([split])
+        assert self.oven.checkpoint is None
+
+    def test_checkpoint(self):
+        # A checkpoint of a previous cook gives the same values.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        window_values = self.cooked_values()
+        checkpoint = self.oven.checkpoint
+        eq_(checkpoint.from_date, date(2008, 1, 10))
+        eq_(checkpoint.account2state[self.checking][2], Amount(45, USD))
+        oven = Oven(self.accounts, self.transactions, [], [])
+        oven.cook_window(date(2008, 2, 10), date(2008, 2, 29), checkpoint=checkpoint)
+        # We cook from the checkpoint, not from the date we asked for.
+        eq_(oven.transactions[0].date, date(2008, 1, 10))
+        eq_(window_values, self.cooked_values())
+
+    def test_checkpoint_after_window_start(self):
+        # A checkpoint starting after the date we ask for is ignored.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        checkpoint = self.oven.checkpoint
+        oven = Oven(self.accounts, self.transactions, [], [])
+        oven.cook_window(date(2008, 1, 5), date(2008, 2, 29), checkpoint=checkpoint)
+        eq_(oven.transactions[0].date, date(2008, 1, 5))
+        eq_(oven.checkpoint.from_date, date(2008, 1, 5))
+
+    def test_checkpoint_mismatch(self):
+        # When data has changed since the checkpoint, it's ignored.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        checkpoint = self.oven.checkpoint
+        txn = self.transactions[8]
+        txn.splits[0].amount = Amount(42, USD)
+        txn.splits[1].amount = Amount(-42, USD)
+        oven = Oven(self.accounts, self.transactions, [], [])
+        oven.cook_window(date(2008, 2, 1), date(2008, 2, 29), checkpoint=checkpoint)
+        eq_(self.checking.entries.balance(date(2008, 1, 31)), Amount(439, USD))
+
+    def test_checkpoint_invalidated_by_history_change(self):
+        # Once history is re-cooked because of a change, our checkpoint isn't valid anymore.
+        self.oven.cook_window(date(2008, 2, 1), date(2008, 2, 29))
+        self.oven.cook_history(date(2008, 1, 1))
+        assert self.oven.checkpoint is not None
+        txn = self.transactions[0]
+        self.oven.cook(txn.date, date(2008, 2, 29), affected_accounts=txn.affected_accounts())
+        assert self.oven.checkpoint is None
@@ -0,0 +1,100 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.recurrence import DateCounter, Recurrence, RepeatType
+from ...model.transaction import Transaction
+
+class TestDateCounter:
+    def counter(self, base_date, repeat_type, repeat_every=1):
+        return DateCounter(base_date, repeat_type, repeat_every, date(2020, 1, 1))
+
+    def test_index_from_daily(self):
+        counter = self.counter(date(2008, 1, 1), RepeatType.Daily, 3)
+        eq_(counter.index_from(date(2007, 12, 1)), 0)
+        eq_(counter.index_from(date(2008, 1, 7)), 2)
+        eq_(counter.index_from(date(2008, 1, 8)), 3)
+        eq_(counter.date_at(3), date(2008, 1, 10))
+
+    def test_index_from_monthly(self):
+        # The 31st becomes the last day of shorter months.
+        counter = self.counter(date(2008, 1, 31), RepeatType.Monthly)
+        eq_(counter.index_from(date(2008, 2, 29)), 1)
+        eq_(counter.index_from(date(2008, 3, 1)), 2)
+        eq_(counter.date_at(13), date(2009, 2, 28))
+
+    def test_index_from_skipped_beats(self):
+        # There's no 5th thursday in February, March or April 2008.
+        counter = self.counter(date(2008, 1, 31), RepeatType.Weekday)
+        eq_(counter.date_at(1), None)
+        eq_(counter.index_from(date(2008, 2, 1)), 4)
+        eq_(counter.date_at(4), date(2008, 5, 29))
+
+    def test_skip_to(self):
+        counter = self.counter(date(2008, 1, 31), RepeatType.Weekday)
+        counter.skip_to(date(2008, 2, 1))
+        eq_(next(counter), date(2008, 5, 29))
+        eq_(next(counter), date(2008, 7, 31))
+        counter = self.counter(date(2008, 1, 31), RepeatType.Weekday)
+        counter.skip_to(date(2008, 1, 1))
+        eq_(next(counter), date(2008, 1, 31))
+
+
+class TestSpawnHorizon:
+    def setup_method(self, method):
+        self.account = Account('Checking', USD, AccountType.Asset)
+        ref = Transaction(date(2008, 1, 15), account=self.account, amount=Amount(42, USD))
+        self.recurrence = Recurrence(ref, RepeatType.Weekly, 1)
+
+    def spawn_dates(self, end):
+        return [s.recurrence_date for s in self.recurrence.get_spawns(end)]
+
+    def fresh_spawn_dates(self, end):
+        # What a recurrence without any spawning history would return.
+        return [s.recurrence_date for s in self.recurrence.replicate().get_spawns(end)]
+
+    def test_extend_and_shrink(self):
+        # Spawning further reuses the spawns we already have. Spawning less far truncates them.
+        first = self.recurrence.get_spawns(date(2008, 3, 1))
+        longer = self.recurrence.get_spawns(date(2008, 6, 1))
+        assert all(a is b for a, b in zip(first, longer))
+        eq_(self.spawn_dates(date(2008, 6, 1)), self.fresh_spawn_dates(date(2008, 6, 1)))
+        eq_(self.spawn_dates(date(2008, 2, 5)), self.fresh_spawn_dates(date(2008, 2, 5)))
+
+    def test_delete(self):
+        self.recurrence.get_spawns(date(2008, 6, 1))
+        self.recurrence.delete_at(date(2008, 2, 12))
+        dates = self.spawn_dates(date(2008, 6, 1))
+        assert date(2008, 2, 12) not in dates
+        eq_(dates, self.fresh_spawn_dates(date(2008, 6, 1)))
+
+    def test_change_globally(self):
+        spawns = self.recurrence.get_spawns(date(2008, 6, 1))
+        spawn = spawns[3]
+        spawn.date = date(2008, 2, 7)
+        self.recurrence.change_globally(spawn)
+        spawns = self.recurrence.get_spawns(date(2008, 6, 1))
+        eq_(spawns[4].date, date(2008, 2, 14))
+
+    def test_repeat_settings(self):
+        self.recurrence.get_spawns(date(2008, 6, 1))
+        self.recurrence.repeat_type = RepeatType.Monthly
+        eq_(self.spawn_dates(date(2008, 6, 1))[:2], [date(2008, 1, 15), date(2008, 2, 15)])
+        self.recurrence.repeat_every = 2
+        eq_(self.spawn_dates(date(2008, 6, 1))[:2], [date(2008, 1, 15), date(2008, 3, 15)])
+
+    def test_stop_date(self):
+        self.recurrence.get_spawns(date(2008, 6, 1))
+        self.recurrence.stop_date = date(2008, 1, 31)
+        eq_(self.spawn_dates(date(2008, 6, 1)), [date(2008, 1, 15), date(2008, 1, 22), date(2008, 1, 29)])
+        self.recurrence.stop_date = None
+        eq_(self.spawn_dates(date(2008, 6, 1)), self.fresh_spawn_dates(date(2008, 6, 1)))
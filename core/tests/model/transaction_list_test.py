@@ -0,0 +1,205 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountType, Group
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.recurrence import Recurrence, RepeatType
+from ...model.transaction import Transaction
+from ...model.transaction_list import SubstringIndex, TransactionList
+
+def test_add_sets_position():
+    # Transactions added at the same date are put after the existing ones.
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    t2 = Transaction(date(2008, 1, 1))
+    t3 = Transaction(date(2008, 1, 2))
+    for txn in [t1, t2, t3]:
+        tlist.add(txn)
+    eq_([t.position for t in tlist], [0, 1, 0])
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), {t1, t2})
+    eq_(tlist.transactions_at_date(date(2008, 1, 3)), set())
+
+def test_index_built_from_initial_list():
+    # A list created with initial transactions correctly indexes them.
+    t1 = Transaction(date(2008, 1, 1))
+    t2 = Transaction(date(2008, 1, 2))
+    tlist = TransactionList([t1, t2])
+    eq_(tlist.transactions_at_date(date(2008, 1, 2)), {t2})
+
+def test_remove_and_clear():
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    t2 = Transaction(date(2008, 1, 1))
+    tlist.add(t1)
+    tlist.add(t2)
+    tlist.remove(t1)
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), {t2})
+    tlist.clear()
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), set())
+    tlist.add(t2)
+    eq_(t2.position, 1) # we're alone at this date, the position is kept as is.
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), {t2})
+
+def test_reindex_transaction():
+    # After a date change, reindex_transaction() makes the transaction show up at its new date.
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    t2 = Transaction(date(2008, 1, 2))
+    tlist.add(t1)
+    tlist.add(t2)
+    t1.date = date(2008, 1, 2)
+    tlist.reindex_transaction(t1, date(2008, 1, 1))
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), set())
+    eq_(tlist.transactions_at_date(date(2008, 1, 2)), {t1, t2})
+    tlist.move_last(t1)
+    eq_(t1.position, 1)
+
+def test_reindex():
+    # After changes we haven't been told about, reindex() makes our indexes reflect them.
+    t1 = Transaction(date(2008, 1, 1), description='foo')
+    tlist = TransactionList([t1])
+    tlist.transactions_at_date(date(2008, 1, 1))
+    tlist.matcher({})
+    t1.date = date(2008, 1, 2)
+    t1.description = 'bar'
+    tlist.reindex()
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), set())
+    eq_(tlist.transactions_at_date(date(2008, 1, 2)), {t1})
+    assert tlist.matcher({'description': 'bar'})(t1)
+
+def test_remove_after_unindexed_date_change():
+    # If a transaction's date changed without reindexing, removing it doesn't leave a stale index.
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    tlist.add(t1)
+    t1.date = date(2008, 1, 2)
+    tlist.remove(t1)
+    eq_(tlist.transactions_at_date(date(2008, 1, 1)), set())
+    eq_(tlist.transactions_at_date(date(2008, 1, 2)), set())
+
+def test_move_before():
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    t2 = Transaction(date(2008, 1, 1))
+    t3 = Transaction(date(2008, 1, 1))
+    for txn in [t1, t2, t3]:
+        tlist.add(txn)
+    tlist.move_before(t3, t1)
+    eq_(sorted(tlist, key=lambda t: t.position), [t3, t1, t2])
+
+def test_move_before_not_in_list():
+    # Moving a transaction that isn't in the list does nothing.
+    tlist = TransactionList()
+    t1 = Transaction(date(2008, 1, 1))
+    tlist.add(t1)
+    t2 = Transaction(date(2008, 1, 1))
+    tlist.move_before(t2, t1)
+    eq_(t1.position, 0)
+    eq_(t2.position, 0)
+
+class TestMatcher:
+    def setup_method(self, method):
+        self.group = Group('Banks', AccountType.Asset)
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.checking.group = self.group
+        self.expense = Account('Groceries', USD, AccountType.Expense)
+        self.tlist = TransactionList()
+        self.t1 = Transaction(
+            date(2008, 1, 1), description='Coffee Shop', payee='Starbucks', checkno='42',
+            account=self.checking, amount=Amount(12, USD)
+        )
+        self.t1.splits[1].account = self.expense
+        self.t1.splits[0].memo = 'Latte'
+        self.t2 = Transaction(date(2008, 1, 2), description='Rent', payee='Landlord')
+        for txn in [self.t1, self.t2]:
+            self.tlist.add(txn)
+
+    def matching(self, query):
+        is_matching = self.tlist.matcher(query)
+        return [t for t in self.tlist if is_matching(t)]
+
+    def test_same_results_as_matches(self):
+        # The matcher gives the same answers as Transaction.matches().
+        queries = [
+            {'description': 'shop'}, {'payee': 'land'}, {'checkno': '42'}, {'checkno': '4'},
+            {'memo': 'latt'}, {'amount': Amount(12, USD)}, {'account': {'groceries'}},
+            {'group': {'banks'}}, {'description': 'nothing', 'payee': 'lord'}, {'memo': ''},
+            {'amount': (Amount(1, USD), Amount(20, USD))}, {'amount': 0}, {'description': 'ee s'},
+            {'description': 'offee shop'}, {'description': 'e'}, {'description': ' '}, {'payee': 'arbuc'},
+        ]
+        for query in queries:
+            eq_(self.matching(query), [t for t in self.tlist if t.matches(query)])
+
+    def test_reindex_after_change(self):
+        # After a change, reindex_transaction() makes the index reflect new values.
+        self.tlist.matcher({})
+        self.t2.description = 'Coffee'
+        self.t1.splits[1].account = None
+        self.tlist.reindex_transaction(self.t2)
+        self.tlist.reindex_transaction(self.t1)
+        eq_(self.matching({'description': 'coffee'}), [self.t1, self.t2])
+        eq_(self.matching({'account': {'groceries'}}), [])
+
+    def test_account_and_group_names_resolved_at_query_time(self):
+        # Renaming an account or a group doesn't require reindexing.
+        self.tlist.matcher({})
+        self.expense.name = 'Food'
+        self.group.name = 'Money'
+        eq_(self.matching({'account': {'food'}}), [self.t1])
+        eq_(self.matching({'group': {'money'}}), [self.t1])
+
+    def test_add_and_remove(self):
+        self.tlist.matcher({})
+        self.tlist.remove(self.t1)
+        t3 = Transaction(date(2008, 1, 3), description='Coffee beans')
+        self.tlist.add(t3)
+        eq_(self.matching({'description': 'coffee'}), [t3])
+
+    def test_transactions_not_in_list(self):
+        # Transactions that aren't in the list, such as spawns, are matched directly.
+        ref = Transaction(date(2008, 1, 1), description='Coffee')
+        recurrence = Recurrence(ref, RepeatType.Monthly, 1)
+        spawn = recurrence.get_spawns(date(2008, 3, 1))[1]
+        is_matching = self.tlist.matcher({'description': 'coffee'})
+        assert is_matching(spawn)
+        assert not is_matching(Transaction(date(2008, 1, 1), description='Tea'))
+
+    def test_amount_range(self):
+        t3 = Transaction(date(2008, 1, 3), account=self.checking, amount=Amount(-150, USD))
+        self.tlist.add(t3)
+        eq_(self.matching({'amount': (Amount(10, USD), Amount(12, USD))}), [self.t1])
+        eq_(self.matching({'amount': (Amount(12, USD), Amount(200, USD))}), [self.t1, t3])
+        self.tlist.remove(t3)
+        eq_(self.matching({'amount': Amount(150, USD)}), [])
+
+
+class TestSubstringIndex:
+    def setup_method(self, method):
+        self.index = SubstringIndex()
+        for string in ['coffee shop', 'coffee beans', 'shopping', '']:
+            self.index.add(string)
+
+    def test_containing(self):
+        # We get the same results as a scan of all strings, for any substring.
+        strings = ['coffee shop', 'coffee beans', 'shopping', '']
+        for substring in ['offe', 'shop', 'ee sh', 'e', 'ee', '', ' ', 'coffee  shop', 'tea', 'hoppi']:
+            eq_(self.index.containing(substring), {s for s in strings if substring in s})
+
+    def test_remove(self):
+        # A string is forgotten once it's been removed as many times as it's been added.
+        self.index.add('shopping')
+        self.index.remove('shopping')
+        eq_(self.index.containing('hopp'), {'shopping'})
+        self.index.remove('shopping')
+        eq_(self.index.containing('hopp'), set())
+        self.index.remove('coffee shop')
+        eq_(self.index.containing('shop'), set())
+        eq_(self.index.containing('coff'), {'coffee beans'})
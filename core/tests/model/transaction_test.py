@@ -0,0 +1,63 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.transaction import Split, StringPool, Transaction
+
+def make_str(s):
+    # A new instance of `s`, not the one the compiler already interned.
+    return ''.join(list(s))
+
+class TestStringPool:
+    def test_intern(self):
+        pool = StringPool()
+        first = make_str('foobar')
+        assert pool.intern(first) is first
+        assert pool.intern(make_str('foobar')) is first
+        eq_(len(pool), 1)
+
+    def test_change_with_pool(self):
+        # Descriptions and payees given to change() go through the pool.
+        pool = StringPool()
+        payee = pool.intern(make_str('payee'))
+        txn = Transaction(date(2008, 1, 1))
+        txn.change(description=make_str('desc'), payee=make_str('payee'), string_pool=pool)
+        assert txn.payee is payee
+        assert txn.description is pool.intern(make_str('desc'))
+
+    def test_change_without_pool(self):
+        txn = Transaction(date(2008, 1, 1))
+        description = make_str('desc')
+        txn.change(description=description)
+        assert txn.description is description
+
+    def test_set_splits_with_pool(self):
+        # Memos of splits given to set_splits() go through the pool.
+        pool = StringPool()
+        memo = pool.intern(make_str('memo'))
+        txn = Transaction(date(2008, 1, 1))
+        other = Transaction(date(2008, 1, 1))
+        other.splits = [Split(other, None, 0), Split(other, None, 0)]
+        other.splits[0].memo = make_str('memo')
+        txn.set_splits(other.splits, string_pool=pool)
+        assert txn.splits[0].memo is memo
+        other.splits[1].memo = make_str('memo')
+        txn.set_splits(other.splits, preserve_instances=True, string_pool=pool)
+        assert txn.splits[1].memo is memo
+
+    def test_intern_strings(self):
+        pool = StringPool()
+        txn = Transaction(date(2008, 1, 1), description=make_str('desc'), payee=make_str('payee'))
+        txn.splits = [Split(txn, None, 0)]
+        txn.splits[0].memo = make_str('memo')
+        txn.intern_strings(pool)
+        assert txn.description is pool[txn.description]
+        assert txn.payee is pool[txn.payee]
+        assert txn.splits[0].memo is pool[txn.splits[0].memo]
+        eq_(len(pool), 3)
@@ -0,0 +1,170 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+"""Generates large, realistic moneyGuru documents for benchmarking purposes.
+
+Generation is seeded: the same parameters always yield the same file, byte for byte.
+"""
+
+import random
+from datetime import date, timedelta
+
+from ..model.account import Account, Group, AccountType
+from ..model.amount import Amount
+from ..model.budget import Budget
+from ..model.currency import Currency
+from ..model.recurrence import Recurrence, RepeatType
+from ..model.transaction import Transaction, Split
+from ..saver.native import save as save_native
+
+WORDS = [
+    'grocery', 'rent', 'salary', 'coffee', 'gas', 'insurance', 'phone', 'internet', 'movie',
+    'restaurant', 'pharmacy', 'hardware', 'books', 'clothing', 'gift', 'transfer', 'payment',
+    'refund', 'subscription', 'taxi', 'parking', 'electricity', 'water', 'dentist', 'gym',
+    'bakery', 'butcher', 'flowers', 'repair', 'tuition', 'daycare', 'vet', 'hotel', 'flight',
+]
+# Share of the accounts for each type. Every type gets at least one account.
+ACCOUNT_TYPE_WEIGHTS = [
+    (AccountType.Asset, 4), (AccountType.Liability, 1), (AccountType.Income, 2),
+    (AccountType.Expense, 3),
+]
+REFERENCE = 'SYNTHETIC-ACCOUNT'
+DEFAULT_START_DATE = date(2010, 1, 1)
+
+def random_amount(rng, currency, maximum=2000):
+    return Amount(rng.randint(100, maximum * 100) / 100, currency)
+
+def phrase(rng, pool, count):
+    return ' '.join(rng.choice(pool) for _ in range(count))
+
+def generate_document(
+        filename, transaction_count=10000, account_count=50, group_count=6,
+        currencies=('USD', 'CAD', 'EUR'), schedule_count=20, budget_count=10,
+        start_date=DEFAULT_START_DATE, years=10, seed=0):
+    """Writes a moneyGuru document with the given characteristics to ``filename``.
+
+    Transactions are spread evenly over ``years`` years starting at ``start_date``. Balance sheet
+    accounts use ``currencies`` in turn, the first one being the default currency of the
+    document. The first asset account has a reference (:data:`REFERENCE`) and its splits all have
+    one too (``REF<index>``), which allows import matching by reference.
+
+    Returns a ``dict`` of the generated objects (``accounts``, ``groups``, ``transactions``,
+    ``schedules`` and ``budgets``).
+    """
+    rng = random.Random(seed)
+    currencies = [Currency(code) for code in currencies]
+    default_currency = currencies[0]
+    descriptions = [phrase(rng, WORDS, 3) for _ in range(max(transaction_count // 20, 10))]
+    payees = ['%s %d' % (rng.choice(WORDS).capitalize(), i) for i in range(max(transaction_count // 50, 10))]
+
+    groups = []
+    for i in range(group_count):
+        account_type = ACCOUNT_TYPE_WEIGHTS[i % len(ACCOUNT_TYPE_WEIGHTS)][0]
+        groups.append(Group('Group %d' % i, account_type))
+    total_weight = sum(weight for _, weight in ACCOUNT_TYPE_WEIGHTS)
+    type2accounts = {}
+    for account_type, weight in ACCOUNT_TYPE_WEIGHTS:
+        count = max(account_count * weight // total_weight, 1)
+        accounts = []
+        for i in range(count):
+            if account_type in (AccountType.Asset, AccountType.Liability):
+                currency = currencies[i % len(currencies)]
+            else:
+                currency = default_currency
+            account = Account('%s %d' % (account_type, i), currency, account_type)
+            type_groups = [g for g in groups if g.type == account_type]
+            if type_groups and rng.random() < 0.5:
+                account.group = rng.choice(type_groups)
+            accounts.append(account)
+        type2accounts[account_type] = accounts
+    sheet_accounts = type2accounts[AccountType.Asset] + type2accounts[AccountType.Liability]
+    referenced_account = type2accounts[AccountType.Asset][0]
+    referenced_account.reference = REFERENCE
+    referenced_account.account_number = '1000'
+    all_accounts = [a for account_type, _ in ACCOUNT_TYPE_WEIGHTS for a in type2accounts[account_type]]
+
+    end_date = start_date + timedelta(days=365 * years)
+    day_count = (end_date - start_date).days
+    reconciled_until = end_date - timedelta(days=365)
+    transactions = []
+    for i in range(transaction_count):
+        txn_date = start_date + timedelta(days=i * day_count // transaction_count)
+        account = rng.choice(sheet_accounts)
+        amount = random_amount(rng, account.currency)
+        roll = rng.random()
+        if roll < 0.3:
+            other = rng.choice(type2accounts[AccountType.Income])
+        elif roll < 0.9:
+            other = rng.choice(type2accounts[AccountType.Expense])
+            amount = -amount
+        elif roll < 0.95:
+            other = rng.choice(sheet_accounts)
+            if other.currency != account.currency:
+                other = None
+        else:
+            other = None # unassigned
+        checkno = str(rng.randint(100, 9999)) if rng.random() < 0.1 else None
+        txn = Transaction(
+            txn_date, description=rng.choice(descriptions), payee=rng.choice(payees),
+            checkno=checkno, account=account, amount=amount,
+        )
+        txn.splits[1].account = other
+        if other is not None and rng.random() < 0.1:
+            # split the counterpart in two
+            part = Amount(round(amount.value / 3, 2), amount.currency)
+            txn.splits[1].amount = -amount + part
+            txn.splits.append(Split(txn, rng.choice(type2accounts[AccountType.Expense]), -part))
+            txn.splits[2].memo = phrase(rng, WORDS, 2)
+        if rng.random() < 0.2:
+            txn.splits[0].memo = phrase(rng, WORDS, 2)
+        if account is referenced_account:
+            txn.splits[0].reference = 'REF%d' % i
+        if txn_date < reconciled_until:
+            for split in txn.splits:
+                if split.account is not None and split.account.is_balance_sheet_account():
+                    split.reconciliation_date = txn_date
+        txn.mtime = i
+        transactions.append(txn)
+
+    schedules = []
+    for i in range(schedule_count):
+        account = rng.choice(sheet_accounts)
+        ref_date = start_date + timedelta(days=rng.randrange(day_count))
+        ref = Transaction(
+            ref_date, description='scheduled %s' % rng.choice(WORDS), payee=rng.choice(payees),
+            account=account, amount=-random_amount(rng, account.currency, maximum=500),
+        )
+        ref.splits[1].account = rng.choice(type2accounts[AccountType.Expense])
+        repeat_type = rng.choice([RepeatType.Weekly, RepeatType.Monthly, RepeatType.Yearly])
+        schedules.append(Recurrence(ref, repeat_type, rng.randint(1, 3)))
+
+    budgets = []
+    budgeted_accounts = type2accounts[AccountType.Expense] + type2accounts[AccountType.Income]
+    for i in range(budget_count):
+        account = budgeted_accounts[i % len(budgeted_accounts)]
+        target = rng.choice(type2accounts[AccountType.Asset])
+        if target.currency != account.currency:
+            target = None
+        ref_date = start_date + timedelta(days=rng.randrange(day_count))
+        budgets.append(Budget(account, target, random_amount(rng, account.currency), ref_date))
+
+    properties = {
+        'default_currency': default_currency,
+        'first_weekday': 0,
+        'ahead_months': 3,
+        'year_start_month': 1,
+    }
+    save_native(
+        filename, 'synthetic-%d' % seed, properties, all_accounts, groups, transactions,
+        schedules, budgets
+    )
+    return {
+        'accounts': all_accounts,
+        'groups': groups,
+        'transactions': transactions,
+        'schedules': schedules,
+        'budgets': budgets,
+    }
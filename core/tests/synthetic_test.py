@@ -0,0 +1,33 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from hscommon.testutil import eq_
+
+from ..loader import native
+from ..model.currency import USD
+from .synthetic import generate_document, REFERENCE
+
+def test_generation_is_deterministic(tmpdir):
+    # The same parameters always give the same file.
+    path1 = str(tmpdir.join('foo1.moneyguru'))
+    path2 = str(tmpdir.join('foo2.moneyguru'))
+    generate_document(path1, transaction_count=200, seed=42)
+    generate_document(path2, transaction_count=200, seed=42)
+    eq_(open(path1, 'rb').read(), open(path2, 'rb').read())
+
+def test_generated_document_loads(tmpdir):
+    path = str(tmpdir.join('foo.moneyguru'))
+    generate_document(
+        path, transaction_count=200, account_count=20, schedule_count=3, budget_count=2
+    )
+    loader = native.Loader(USD)
+    loader.parse(path)
+    loader.load()
+    eq_(len(loader.transactions), 200)
+    eq_(len(loader.accounts), 20)
+    eq_(len(loader.schedules), 3)
+    eq_(len(loader.budgets), 2)
+    eq_(len([a for a in loader.accounts if a.reference == REFERENCE]), 1)
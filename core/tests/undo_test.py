@@ -454,6 +454,21 @@ def test_etable_refreshes(app):
     eq_(app.etable_count(), 1)
     app.check_gui_calls(app.etable_gui, ['refresh', 'stop_editing'])
 
+@with_app(app_two_txns_in_two_accounts)
+def test_undo_only_recooks_affected_accounts(app):
+    # Undoing a change only recooks the accounts affected by the undone action. Other accounts keep
+    # their entries.
+    row = app.etable.selected_row
+    row.increase = '12'
+    app.etable.save_edits()
+    second = app.doc.accounts.find('second')
+    second_entries = list(second.entries)
+    app.doc.undo()
+    assert all(e1 is e2 for e1, e2 in zip(second_entries, second.entries))
+    eq_(app.etable[1].balance, '42.00')
+    app.doc.redo()
+    eq_(app.etable[1].balance, '12.00')
+
 @with_app(app_two_txns_in_two_accounts)
 def test_ttable_refreshes(app):
     app.show_tview()